@@ -0,0 +1,186 @@
+"""
+Admission control for Laika Dynamics RAG System
+Per-endpoint concurrency limits with bounded wait queues and per-client token-bucket rate limiting
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from fastapi import HTTPException, Request
+
+ADMISSION_WAIT_TIMEOUT = float(os.getenv("ADMISSION_WAIT_TIMEOUT", "5"))
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "120"))  # 0 disables
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() in ("1", "true", "yes")
+
+# endpoint -> (max concurrent, max waiting)
+ENDPOINT_LIMITS = {
+    "rag_query": (
+        int(os.getenv("RAG_QUERY_MAX_CONCURRENT", "8")),
+        int(os.getenv("RAG_QUERY_MAX_WAITING", "16"))
+    ),
+    "rag_search": (
+        int(os.getenv("RAG_SEARCH_MAX_CONCURRENT", "32")),
+        int(os.getenv("RAG_SEARCH_MAX_WAITING", "64"))
+    ),
+    "data_upload": (
+        int(os.getenv("UPLOAD_MAX_CONCURRENT", "2")),
+        int(os.getenv("UPLOAD_MAX_WAITING", "4"))
+    ),
+}
+
+
+class AdmissionRejected(Exception):
+    """Raised when an endpoint is saturated and the request cannot wait"""
+
+
+class ConcurrencyLimiter:
+    """Semaphore with a bounded number of waiters and a wait deadline"""
+
+    def __init__(self, name: str, max_concurrent: int, max_waiting: int, wait_timeout: float = None):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout if wait_timeout is not None else ADMISSION_WAIT_TIMEOUT
+        self._semaphore = None  # created on first use, inside the event loop
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def acquire(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        if self._semaphore.locked():
+            if self.waiting >= self.max_waiting:
+                self.rejected += 1
+                raise AdmissionRejected(f"{self.name} is at capacity ({self.max_concurrent} running, {self.waiting} waiting)")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise AdmissionRejected(f"{self.name} wait exceeded {self.wait_timeout}s")
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.active += 1
+        self.admitted += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_waiting": self.max_waiting,
+            "wait_timeout_seconds": self.wait_timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
+
+
+class TokenBucketRateLimiter:
+    """Per-client token buckets, bounded to the most recently seen clients"""
+
+    def __init__(self, per_minute: float = None, burst: int = None, max_clients: int = None):
+        self.rate = (per_minute if per_minute is not None else RATE_LIMIT_PER_MINUTE) / 60.0
+        self.burst = burst or RATE_LIMIT_BURST
+        self.max_clients = max_clients or RATE_LIMIT_MAX_CLIENTS
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def allow(self, client: str) -> Tuple[bool, float]:
+        """Take a token for client; returns (allowed, seconds until the next token)"""
+        if not self.enabled:
+            return True, 0.0
+
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        else:
+            self.limited += 1
+
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+        return allowed, 0.0 if allowed else (1.0 - tokens) / self.rate
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "requests_per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "tracked_clients": len(self._buckets),
+            "limited": self.limited
+        }
+
+
+limiters = {
+    name: ConcurrencyLimiter(name, max_concurrent, max_waiting)
+    for name, (max_concurrent, max_waiting) in ENDPOINT_LIMITS.items()
+}
+rate_limiter = TokenBucketRateLimiter()
+
+
+def client_id(request: Request) -> str:
+    if TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def admission(endpoint: str):
+    """FastAPI dependency: rate-limit the client, then hold a concurrency slot for the request"""
+    limiter = limiters[endpoint]
+
+    async def dependency(request: Request):
+        allowed, retry_after = rate_limiter.allow(client_id(request))
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+        try:
+            await limiter.acquire()
+        except AdmissionRejected as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return dependency
+
+
+def admission_stats() -> Dict[str, Any]:
+    return {
+        "endpoints": {name: limiter.stats() for name, limiter in limiters.items()},
+        "rate_limit": rate_limiter.stats()
+    }
@@ -0,0 +1,244 @@
+"""
+Contract analytics for Laika Dynamics RAG System
+Keeps materialized aggregates in step with web_contracts so the overview is a cheap lookup
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import select, func, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import engine, WebContract, ContractAggregate
+
+# Aggregated dimensions -> web_contracts column
+DIMENSIONS = {
+    "industry": "client_industry",
+    "contract_type": "contract_type",
+    "status": "status",
+}
+TOTAL_KEY = ("total", "all")
+UNKNOWN = "Unknown"
+
+# SQLite's default host-parameter limit on older builds is 999
+SNAPSHOT_CHUNK_SIZE = 900
+
+_contracts = WebContract.__table__
+_aggregates = ContractAggregate.__table__
+
+SNAPSHOT_COLUMNS = [
+    _contracts.c.contract_id,
+    _contracts.c.client_industry,
+    _contracts.c.contract_type,
+    _contracts.c.status,
+    _contracts.c.start_date,
+    _contracts.c.contract_value,
+    _contracts.c.estimated_hours,
+    _contracts.c.hourly_rate,
+]
+
+Delta = Dict[Tuple[str, str], List[float]]  # (dimension, key) -> [count, value, hours, rate]
+
+
+def _month_key(value) -> str:
+    if value is None:
+        return UNKNOWN
+    if isinstance(value, str):
+        return value[:7]
+    return value.strftime("%Y-%m")
+
+
+def _row_keys(row) -> List[Tuple[str, str]]:
+    """Aggregate buckets a contract row contributes to"""
+    keys = [TOTAL_KEY, ("month", _month_key(row.start_date))]
+    for dimension, column in DIMENSIONS.items():
+        keys.append((dimension, getattr(row, column) or UNKNOWN))
+    return keys
+
+
+def _accumulate(delta: Delta, rows: Iterable, sign: int):
+    for row in rows:
+        contribution = [
+            1,
+            row.contract_value or 0.0,
+            row.estimated_hours or 0.0,
+            row.hourly_rate or 0.0,
+        ]
+        for key in _row_keys(row):
+            bucket = delta[key]
+            for i, amount in enumerate(contribution):
+                bucket[i] += sign * amount
+
+
+def snapshot_contracts(conn, contract_ids: List[str]) -> List[Any]:
+    """Fetch the aggregated columns for a set of contracts"""
+    rows = []
+    for i in range(0, len(contract_ids), SNAPSHOT_CHUNK_SIZE):
+        chunk = contract_ids[i:i + SNAPSHOT_CHUNK_SIZE]
+        rows.extend(conn.execute(
+            select(*SNAPSHOT_COLUMNS).where(_contracts.c.contract_id.in_(chunk))
+        ).fetchall())
+    return rows
+
+
+def apply_aggregate_deltas(conn, before: List[Any], after: List[Any]):
+    """Move aggregates from the 'before' snapshot of some contracts to their 'after' snapshot"""
+    delta: Delta = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    _accumulate(delta, before, -1)
+    _accumulate(delta, after, 1)
+
+    changes = [
+        {
+            "dimension": dimension,
+            "key": key,
+            "count": int(values[0]),
+            "value_sum": values[1],
+            "hours_sum": values[2],
+            "hourly_rate_sum": values[3],
+            "updated_at": datetime.utcnow()
+        }
+        for (dimension, key), values in delta.items()
+        if any(values)
+    ]
+    if not changes:
+        return
+
+    stmt = sqlite_insert(_aggregates)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["dimension", "key"],
+        set_={
+            "count": _aggregates.c.count + stmt.excluded.count,
+            "value_sum": _aggregates.c.value_sum + stmt.excluded.value_sum,
+            "hours_sum": _aggregates.c.hours_sum + stmt.excluded.hours_sum,
+            "hourly_rate_sum": _aggregates.c.hourly_rate_sum + stmt.excluded.hourly_rate_sum,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    conn.execute(stmt, changes)
+    conn.execute(delete(_aggregates).where(_aggregates.c.count <= 0))
+
+
+def _full_recompute(conn) -> Dict[Tuple[str, str], List[float]]:
+    """Aggregate every row of web_contracts from scratch"""
+    measures = [
+        func.count(),
+        func.coalesce(func.sum(_contracts.c.contract_value), 0.0),
+        func.coalesce(func.sum(_contracts.c.estimated_hours), 0.0),
+        func.coalesce(func.sum(_contracts.c.hourly_rate), 0.0),
+    ]
+    groupings = {
+        "total": None,
+        "month": func.coalesce(func.strftime("%Y-%m", _contracts.c.start_date), UNKNOWN),
+    }
+    for dimension, column in DIMENSIONS.items():
+        groupings[dimension] = func.coalesce(func.nullif(_contracts.c[column], ""), UNKNOWN)
+
+    result = {}
+    for dimension, expression in groupings.items():
+        if expression is None:
+            count, value, hours, rate = conn.execute(select(*measures)).one()
+            if count:
+                result[TOTAL_KEY] = [count, value, hours, rate]
+            continue
+        for key, count, value, hours, rate in conn.execute(
+            select(expression, *measures).group_by(expression)
+        ):
+            result[(dimension, key)] = [count, value, hours, rate]
+    return result
+
+
+def _materialized(conn) -> Dict[Tuple[str, str], List[float]]:
+    return {
+        (row.dimension, row.key): [row.count, row.value_sum, row.hours_sum, row.hourly_rate_sum]
+        for row in conn.execute(select(_aggregates))
+    }
+
+
+def rebuild_aggregates() -> Dict[str, Any]:
+    """Replace the materialized aggregates with a full recompute"""
+    with engine.begin() as conn:
+        expected = _full_recompute(conn)
+        conn.execute(delete(_aggregates))
+        if expected:
+            now = datetime.utcnow()
+            conn.execute(_aggregates.insert(), [
+                {
+                    "dimension": dimension, "key": key, "count": values[0], "value_sum": values[1],
+                    "hours_sum": values[2], "hourly_rate_sum": values[3], "updated_at": now
+                }
+                for (dimension, key), values in expected.items()
+            ])
+    return {"status": "rebuilt", "buckets": len(expected)}
+
+
+def check_consistency(tolerance: float = 0.01) -> Dict[str, Any]:
+    """Compare materialized aggregates against a full recompute of web_contracts"""
+    with engine.connect() as conn:
+        expected = _full_recompute(conn)
+        actual = _materialized(conn)
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        want = expected.get(key, [0, 0.0, 0.0, 0.0])
+        have = actual.get(key, [0, 0.0, 0.0, 0.0])
+        if any(abs(w - h) > tolerance for w, h in zip(want, have)):
+            mismatches.append({
+                "dimension": key[0],
+                "key": key[1],
+                "expected": {"count": want[0], "value_sum": want[1]},
+                "materialized": {"count": have[0], "value_sum": have[1]},
+            })
+
+    return {
+        "consistent": not mismatches,
+        "buckets_checked": len(set(expected) | set(actual)),
+        "mismatches": mismatches[:50],
+        "mismatch_count": len(mismatches),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def _distribution(aggregates, dimension: str, total: int, label: str, limit: int = None) -> List[Dict[str, Any]]:
+    buckets = sorted(
+        ((key, values) for (dim, key), values in aggregates.items() if dim == dimension),
+        key=lambda item: item[1][0],
+        reverse=True
+    )
+    if limit:
+        buckets = buckets[:limit]
+    return [
+        {
+            label: key,
+            "count": values[0],
+            "percentage": round(values[0] / total * 100, 1) if total else 0.0
+        }
+        for key, values in buckets
+    ]
+
+
+def get_overview(top_n: int = 5) -> Dict[str, Any]:
+    """Analytics overview read from the materialized aggregates"""
+    with engine.connect() as conn:
+        aggregates = _materialized(conn)
+
+    count, value, hours, rate = aggregates.get(TOTAL_KEY, [0, 0.0, 0.0, 0.0])
+    months = sorted(
+        (key, values) for (dim, key), values in aggregates.items()
+        if dim == "month" and key != UNKNOWN
+    )
+
+    return {
+        "total_contracts": count,
+        "total_value": round(value, 2),
+        "avg_contract_value": round(value / count, 2) if count else 0.0,
+        "avg_hourly_rate": round(rate / count, 2) if count else 0.0,
+        "avg_estimated_hours": round(hours / count, 1) if count else 0.0,
+        "top_industries": _distribution(aggregates, "industry", count, "industry", top_n),
+        "contract_types": _distribution(aggregates, "contract_type", count, "type"),
+        "status_distribution": _distribution(aggregates, "status", count, "status"),
+        "monthly_revenue": [
+            {"month": month, "revenue": round(values[1], 2), "contracts": values[0]}
+            for month, values in months
+        ]
+    }
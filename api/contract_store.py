@@ -0,0 +1,57 @@
+"""
+Contract record store for Laika Dynamics RAG System
+Fetches full web_contracts rows for search hits when Qdrant points carry slim payloads
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from .models import engine, WebContract
+
+# Contract fields only - the same set a full payload carries
+RECORD_COLUMNS = [
+    column.name for column in WebContract.__table__.columns
+    if column.name not in ("id", "created_at", "updated_at")
+]
+
+# SQLite caps bound parameters per statement; stay well below it
+MAX_IDS_PER_QUERY = 900
+
+
+def payload_value(value: Any) -> str:
+    """String form of a contract field in a Qdrant payload, shared by full payloads and hydration
+
+    Dates are stored as DateTime, so every date-like value renders as a timestamp
+    (2025-06-21T00:00:00) whether it came from a DataFrame or from SQLite.
+    """
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return ""
+    if isinstance(value, (date, pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def fetch_contracts(contract_ids: List[str], columns: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """contract_id -> record for the given IDs, in one indexed IN query per 900 IDs"""
+    columns = [col for col in (columns or RECORD_COLUMNS) if col in RECORD_COLUMNS]
+    if "contract_id" not in columns:
+        columns.append("contract_id")
+    ids = list(dict.fromkeys(cid for cid in contract_ids if cid))
+
+    table = WebContract.__table__
+    records = {}
+    with engine.connect() as conn:
+        for start in range(0, len(ids), MAX_IDS_PER_QUERY):
+            # Typed select so dates and booleans come back as Python values, not SQLite strings
+            query = select(*(table.c[col] for col in columns)).where(
+                table.c.contract_id.in_(ids[start:start + MAX_IDS_PER_QUERY])
+            )
+            for row in conn.execute(query).mappings():
+                records[row["contract_id"]] = {col: payload_value(row[col]) for col in columns}
+    return records
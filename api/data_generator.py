@@ -6,12 +6,13 @@ Generates realistic business data for RAG demo purposes
 import pandas as pd
 import numpy as np
 from faker import Faker
-from ctgan import CTGAN
 from datetime import datetime, timedelta
 import random
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
+
+from .dataset_io import DATA_DIR, FORMAT_EXTENSIONS, default_dataset_format, detect_format, write_dataset
 
 fake = Faker()
 
@@ -60,12 +61,16 @@ class WebContractDataGenerator:
         # Project statuses
         self.statuses = ["proposal", "active", "completed", "cancelled", "on_hold"]
 
-    def generate_base_dataset(self, num_records: int = 1000) -> pd.DataFrame:
+    def generate_base_dataset(self, num_records: int = 1000,
+                              progress_callback: Optional[Callable[[int], None]] = None) -> pd.DataFrame:
         """Generate base dataset using Faker for CTGAN training"""
         
         data = []
         
         for i in range(num_records):
+            if progress_callback and i and i % 500 == 0:
+                progress_callback(i)
+            
             # Generate realistic contract data
             start_date = self.fake.date_between(start_date='-2y', end_date='today')
             estimated_completion = start_date + timedelta(days=random.randint(14, 365))
@@ -167,8 +172,11 @@ class WebContractDataGenerator:
         ]
         return random.choice(notes) if random.random() > 0.3 else ""
 
-    def train_ctgan_model(self, df: pd.DataFrame) -> CTGAN:
+    def train_ctgan_model(self, df: pd.DataFrame) -> "CTGAN":
         """Train CTGAN model on the base dataset"""
+        # Imported here so the API can import this module without loading torch
+        from ctgan import CTGAN
+        
         print("🤖 Training CTGAN model...")
         
         # Prepare data for CTGAN
@@ -197,7 +205,7 @@ class WebContractDataGenerator:
         print("✅ CTGAN model training completed!")
         return ctgan
 
-    def generate_synthetic_data(self, ctgan_model: CTGAN, num_samples: int = 500) -> pd.DataFrame:
+    def generate_synthetic_data(self, ctgan_model: "CTGAN", num_samples: int = 500) -> pd.DataFrame:
         """Generate synthetic data using trained CTGAN model"""
         print(f"🎯 Generating {num_samples} synthetic records...")
         
@@ -241,20 +249,30 @@ class WebContractDataGenerator:
         
         return df
 
-    def generate_complete_dataset(self, base_size: int = 1000, synthetic_size: int = 2000) -> pd.DataFrame:
-        """Generate complete dataset combining base and synthetic data"""
+    def generate_complete_dataset(self, base_size: int = 1000, synthetic_size: int = 2000,
+                                  progress_callback: Optional[Callable[[int, str], None]] = None) -> pd.DataFrame:
+        """Generate complete dataset combining base and synthetic data
+        
+        progress_callback, if given, receives (rows_done, message) as generation advances.
+        """
         print(f"🚀 Generating complete dataset: {base_size} base + {synthetic_size} synthetic records")
+        report = progress_callback or (lambda rows_done, message: None)
         
         # Step 1: Generate base dataset
-        base_df = self.generate_base_dataset(base_size)
+        base_df = self.generate_base_dataset(
+            base_size, lambda rows_done: report(rows_done, "Generating base dataset...")
+        )
         print(f"✅ Generated {len(base_df)} base records")
+        report(len(base_df), "Training CTGAN model...")
         
         # Step 2: Train CTGAN model
         ctgan_model = self.train_ctgan_model(base_df)
         
         # Step 3: Generate synthetic data
+        report(len(base_df), "Generating synthetic records...")
         synthetic_df = self.generate_synthetic_data(ctgan_model, synthetic_size)
         print(f"✅ Generated {len(synthetic_df)} synthetic records")
+        report(len(base_df) + len(synthetic_df), "Combining datasets...")
         
         # Step 4: Combine datasets
         combined_df = pd.concat([base_df, synthetic_df], ignore_index=True)
@@ -263,17 +281,21 @@ class WebContractDataGenerator:
         print(f"🎉 Complete dataset ready: {len(combined_df)} total records")
         return combined_df
 
-    def save_dataset(self, df: pd.DataFrame, filename: str = None) -> str:
-        """Save dataset to CSV file"""
+    def save_dataset(self, df: pd.DataFrame, filename: str = None, fmt: Optional[str] = None) -> str:
+        """Save dataset as CSV, Parquet or Feather (format taken from fmt, the extension, or DATASET_FORMAT)"""
+        fmt = fmt or (detect_format(filename) if filename else None) or default_dataset_format()
+        extension = FORMAT_EXTENSIONS[fmt]
+
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"web_contracts_dataset_{timestamp}.csv"
-        
-        filepath = os.path.join("data", filename)
-        os.makedirs("data", exist_ok=True)
+            filename = f"web_contracts_dataset_{timestamp}{extension}"
+        elif detect_format(filename) != fmt:
+            stem = os.path.splitext(filename)[0] if detect_format(filename) else filename
+            filename = f"{stem}{extension}"
         
-        df.to_csv(filepath, index=False)
-        print(f"💾 Dataset saved to: {filepath}")
+        filepath = os.path.join(DATA_DIR, filename)
+        write_dataset(df, filepath, fmt)
+        print(f"💾 Dataset saved to: {filepath} ({fmt})")
         return filepath
 
 # Example usage and testing
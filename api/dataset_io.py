@@ -0,0 +1,221 @@
+"""
+Dataset storage for Laika Dynamics RAG System
+Reads and writes contract datasets as CSV, Parquet or Arrow IPC (Feather)
+"""
+
+import pandas as pd
+import os
+from typing import Dict, Any, Iterator, List, Optional
+
+# Columnar formats are optional - fall back to CSV when pyarrow is missing
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DATA_DIR = "data"
+
+# File extension -> storage format
+DATASET_EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+FORMAT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+FEATHER_COMPRESSION = os.getenv("FEATHER_COMPRESSION", "lz4")
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "65536"))
+
+# Typed schema for contract datasets
+DATE_COLUMNS = ["start_date", "estimated_completion", "actual_completion"]
+BOOL_COLUMNS = [
+    "responsive_design", "cms_required", "ecommerce_features",
+    "api_integration", "seo_optimization"
+]
+CATEGORY_COLUMNS = [
+    "contract_type", "payment_terms", "status", "client_industry",
+    "project_complexity", "data_source"
+]
+FLOAT_COLUMNS = ["contract_value", "hourly_rate", "progress_percentage"]
+INT_COLUMNS = ["estimated_hours"]
+
+_BOOL_STRINGS = {"true": True, "false": False, "1": True, "0": False, "yes": True, "no": False}
+
+
+def default_dataset_format() -> str:
+    """Preferred storage format for new datasets"""
+    fmt = os.getenv("DATASET_FORMAT", "parquet" if PYARROW_AVAILABLE else "csv").lower()
+    if fmt not in FORMAT_EXTENSIONS:
+        fmt = "csv"
+    if fmt != "csv" and not PYARROW_AVAILABLE:
+        print(f"⚠️ pyarrow not installed, saving as CSV instead of {fmt}")
+        fmt = "csv"
+    return fmt
+
+
+def detect_format(filepath: str) -> Optional[str]:
+    """Return the storage format for a file path, or None if unsupported"""
+    return DATASET_EXTENSIONS.get(os.path.splitext(filepath)[1].lower())
+
+
+def is_supported_dataset(filename: str) -> bool:
+    """Check whether a file name has a supported dataset extension"""
+    return detect_format(filename) is not None
+
+
+def _to_bool(series: pd.Series) -> pd.Series:
+    """Convert a column of bool-like values to nullable booleans"""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    mapped = series.map(lambda v: v if isinstance(v, bool) else _BOOL_STRINGS.get(str(v).strip().lower()))
+    return mapped.astype("boolean")
+
+
+def normalize_dataset_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply the typed contract schema to whichever known columns are present"""
+    df = df.copy()
+
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+
+    for col in BOOL_COLUMNS:
+        if col in df.columns:
+            df[col] = _to_bool(df[col])
+
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+
+    for col in INT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype("Int64")
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def write_dataset(df: pd.DataFrame, filepath: str, fmt: Optional[str] = None) -> str:
+    """Write a dataset to disk in the requested (or extension-derived) format"""
+    fmt = fmt or detect_format(filepath) or "csv"
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+
+    if fmt == "csv":
+        df.to_csv(filepath, index=False)
+        return filepath
+
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError(f"pyarrow is required to write {fmt} datasets")
+
+    table = pa.Table.from_pandas(normalize_dataset_types(df), preserve_index=False)
+    if fmt == "parquet":
+        pq.write_table(
+            table,
+            filepath,
+            compression=PARQUET_COMPRESSION,
+            row_group_size=PARQUET_ROW_GROUP_SIZE
+        )
+    elif fmt == "feather":
+        feather.write_feather(table, filepath, compression=FEATHER_COMPRESSION)
+    else:
+        raise ValueError(f"Unsupported dataset format: {fmt}")
+
+    return filepath
+
+
+def read_dataset(filepath: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a whole dataset, optionally projecting a subset of columns"""
+    fmt = detect_format(filepath)
+
+    if fmt == "csv":
+        usecols = (lambda c: c in columns) if columns else None
+        return normalize_dataset_types(pd.read_csv(filepath, usecols=usecols))
+
+    if fmt not in ("parquet", "feather"):
+        raise ValueError(f"Unsupported dataset file: {filepath}")
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError(f"pyarrow is required to read {fmt} datasets")
+
+    if fmt == "parquet":
+        table = pq.read_table(filepath, columns=_existing_columns(filepath, columns))
+    else:
+        table = feather.read_table(filepath, columns=_existing_columns(filepath, columns), memory_map=True)
+    return table.to_pandas()
+
+
+def iter_dataset_batches(filepath: str, batch_size: int = 10000,
+                         columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Stream a dataset in DataFrame batches without loading the whole file"""
+    fmt = detect_format(filepath)
+
+    if fmt == "csv":
+        usecols = (lambda c: c in columns) if columns else None
+        for chunk in pd.read_csv(filepath, usecols=usecols, chunksize=batch_size):
+            yield normalize_dataset_types(chunk)
+        return
+
+    if fmt not in ("parquet", "feather"):
+        raise ValueError(f"Unsupported dataset file: {filepath}")
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError(f"pyarrow is required to read {fmt} datasets")
+
+    projected = _existing_columns(filepath, columns)
+
+    if fmt == "parquet":
+        parquet_file = pq.ParquetFile(filepath)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=projected):
+            yield batch.to_pandas()
+        return
+
+    with pa.memory_map(filepath, "r") as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if projected:
+                batch = batch.select(projected)
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size).to_pandas()
+
+
+def dataset_schema(filepath: str) -> Dict[str, Any]:
+    """Cheap row count and column listing, read from file metadata where possible"""
+    fmt = detect_format(filepath)
+    info: Dict[str, Any] = {"format": fmt}
+
+    try:
+        if fmt == "parquet" and PYARROW_AVAILABLE:
+            metadata = pq.read_metadata(filepath)
+            info["records"] = metadata.num_rows
+            info["row_groups"] = metadata.num_row_groups
+            info["columns"] = metadata.schema.to_arrow_schema().names
+        elif fmt == "feather" and PYARROW_AVAILABLE:
+            with pa.memory_map(filepath, "r") as source:
+                reader = pa.ipc.open_file(source)
+                info["records"] = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+                info["columns"] = reader.schema.names
+    except Exception as e:
+        info["error"] = str(e)
+
+    return info
+
+
+def _existing_columns(filepath: str, columns: Optional[List[str]]) -> Optional[List[str]]:
+    """Restrict a projection to columns present in the file schema"""
+    if not columns:
+        return None
+    fmt = detect_format(filepath)
+    if fmt == "parquet":
+        names = pq.read_schema(filepath).names
+    else:
+        with pa.memory_map(filepath, "r") as source:
+            names = pa.ipc.open_file(source).schema.names
+    return [c for c in columns if c in names]
@@ -0,0 +1,77 @@
+"""
+Embedding registry for Laika Dynamics RAG System
+Tags each Qdrant collection with the embedding model and dimension it was built with
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+from .models import SessionLocal, CollectionEmbedding
+
+# provider -> (model, dimension)
+EMBEDDING_MODELS = {
+    "openai": ("text-embedding-ada-002", 1536),
+    "local": (os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2"), 384),
+}
+
+
+def provider_for_dimension(dimension: int) -> Optional[str]:
+    """Best guess for untagged collections created before the registry existed"""
+    for provider, (_, size) in EMBEDDING_MODELS.items():
+        if size == dimension:
+            return provider
+    return None
+
+
+def _to_dict(tag: CollectionEmbedding) -> Dict[str, Any]:
+    return {
+        "collection_name": tag.collection_name,
+        "provider": tag.provider,
+        "model": tag.model,
+        "dimension": tag.dimension,
+        "created_at": tag.created_at.isoformat() if tag.created_at else None
+    }
+
+
+def get_collection_embedding(collection_name: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        tag = db.query(CollectionEmbedding).filter(CollectionEmbedding.collection_name == collection_name).first()
+        return _to_dict(tag) if tag else None
+    finally:
+        db.close()
+
+
+def register_collection_embedding(collection_name: str, provider: str) -> Dict[str, Any]:
+    """Record (or correct) the embedding model of a collection"""
+    model, dimension = EMBEDDING_MODELS[provider]
+    db = SessionLocal()
+    try:
+        tag = db.query(CollectionEmbedding).filter(CollectionEmbedding.collection_name == collection_name).first()
+        if not tag:
+            tag = CollectionEmbedding(collection_name=collection_name)
+            db.add(tag)
+        tag.provider = provider
+        tag.model = model
+        tag.dimension = dimension
+        db.commit()
+        return _to_dict(tag)
+    finally:
+        db.close()
+
+
+def list_collection_embeddings() -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        return [_to_dict(tag) for tag in db.query(CollectionEmbedding).order_by(CollectionEmbedding.created_at).all()]
+    finally:
+        db.close()
+
+
+def delete_collection_embedding(collection_name: str):
+    db = SessionLocal()
+    try:
+        db.query(CollectionEmbedding).filter(CollectionEmbedding.collection_name == collection_name).delete()
+        db.commit()
+    finally:
+        db.close()
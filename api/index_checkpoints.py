@@ -0,0 +1,166 @@
+"""
+Indexing checkpoints for Laika Dynamics RAG System
+Records how far each dataset got into each Qdrant collection so failed indexing resumes instead of restarting
+"""
+
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import select, exists, literal, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import engine, SessionLocal, IndexCheckpoint
+
+# Re-index builds checkpoint under "reindex:<source>:<provider>"
+BUILD_PREFIX = "reindex:"
+
+_checkpoints = IndexCheckpoint.__table__
+
+# Namespace for deterministic Qdrant point IDs
+POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "laika-dynamics/web_contracts")
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame (columns and values, not the index)"""
+    digest = hashlib.sha256("|".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def point_id(contract_id: Optional[str], fingerprint: str, position: int) -> str:
+    """Stable point ID: re-indexing a contract overwrites its point instead of adding another"""
+    key = contract_id if contract_id else f"{fingerprint}:{position}"
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, key))
+
+
+def _to_dict(checkpoint: IndexCheckpoint) -> Dict[str, Any]:
+    return {
+        "fingerprint": checkpoint.fingerprint,
+        "collection_name": checkpoint.collection_name,
+        "status": checkpoint.status,
+        "rows_total": checkpoint.rows_total,
+        "rows_done": checkpoint.rows_done,
+        "batches_done": checkpoint.batches_done,
+        "error": checkpoint.error,
+        "created_at": checkpoint.created_at.isoformat() if checkpoint.created_at else None,
+        "updated_at": checkpoint.updated_at.isoformat() if checkpoint.updated_at else None
+    }
+
+
+def get_checkpoint(fingerprint: str, collection_name: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        checkpoint = db.query(IndexCheckpoint).filter(
+            IndexCheckpoint.fingerprint == fingerprint,
+            IndexCheckpoint.collection_name == collection_name
+        ).first()
+        return _to_dict(checkpoint) if checkpoint else None
+    finally:
+        db.close()
+
+
+def save_checkpoint(fingerprint: str, collection_name: str, **fields) -> Dict[str, Any]:
+    """Create or update the checkpoint for (fingerprint, collection)"""
+    db = SessionLocal()
+    try:
+        checkpoint = db.query(IndexCheckpoint).filter(
+            IndexCheckpoint.fingerprint == fingerprint,
+            IndexCheckpoint.collection_name == collection_name
+        ).first()
+        if not checkpoint:
+            checkpoint = IndexCheckpoint(fingerprint=fingerprint, collection_name=collection_name)
+            db.add(checkpoint)
+        for key, value in fields.items():
+            setattr(checkpoint, key, value)
+        checkpoint.updated_at = datetime.utcnow()
+        db.commit()
+        return _to_dict(checkpoint)
+    finally:
+        db.close()
+
+
+def find_unfinished(fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Most recent checkpoint for fingerprint, in any collection, that did not complete"""
+    db = SessionLocal()
+    try:
+        checkpoint = db.query(IndexCheckpoint).filter(
+            IndexCheckpoint.fingerprint == fingerprint,
+            IndexCheckpoint.status != "completed"
+        ).order_by(IndexCheckpoint.updated_at.desc()).first()
+        return _to_dict(checkpoint) if checkpoint else None
+    finally:
+        db.close()
+
+
+def list_checkpoints(limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        query = db.query(IndexCheckpoint)
+        if status:
+            query = query.filter(IndexCheckpoint.status == status)
+        checkpoints = query.order_by(IndexCheckpoint.updated_at.desc()).limit(limit).all()
+        return [_to_dict(checkpoint) for checkpoint in checkpoints]
+    finally:
+        db.close()
+
+
+def delete_checkpoints(collection_name: str) -> int:
+    """Forget checkpoints of a collection that was dropped"""
+    db = SessionLocal()
+    try:
+        deleted = db.query(IndexCheckpoint).filter(IndexCheckpoint.collection_name == collection_name).delete()
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+
+def _live_builds(stale_after: float):
+    """Re-index builds marked running whose worker touched them within stale_after seconds"""
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+    return select(_checkpoints.c.collection_name).where(
+        _checkpoints.c.fingerprint.like(f"{BUILD_PREFIX}%"),
+        _checkpoints.c.status == "running",
+        _checkpoints.c.updated_at >= cutoff
+    )
+
+
+def claim_build(build_key: str, collection_name: str, stale_after: float) -> bool:
+    """Mark a re-index build running unless another live build holds the lock
+
+    One INSERT ... SELECT ... WHERE NOT EXISTS statement, so two workers can't
+    both claim; a build whose worker died goes stale and can be taken over.
+    """
+    now = datetime.utcnow()
+    claim = select(
+        literal(build_key), literal(collection_name), literal("running"), literal(now), literal(now)
+    ).where(~exists(_live_builds(stale_after)))
+    statement = sqlite_insert(_checkpoints).from_select(
+        ["fingerprint", "collection_name", "status", "created_at", "updated_at"], claim
+    ).on_conflict_do_update(
+        index_elements=["fingerprint", "collection_name"],
+        set_={"status": "running", "error": None, "updated_at": now}
+    )
+    with engine.begin() as conn:
+        return conn.execute(statement).rowcount > 0
+
+
+def touch_build(build_key: str, collection_name: str):
+    """Heartbeat of a running build, so other workers keep treating it as live"""
+    with engine.begin() as conn:
+        conn.execute(
+            update(_checkpoints)
+            .where(_checkpoints.c.fingerprint == build_key,
+                   _checkpoints.c.collection_name == collection_name,
+                   _checkpoints.c.status == "running")
+            .values(updated_at=datetime.utcnow())
+        )
+
+
+def active_builds(stale_after: float) -> List[str]:
+    """Collections a re-index is building right now, in any worker"""
+    with engine.connect() as conn:
+        return [name for (name,) in conn.execute(_live_builds(stale_after))]
@@ -0,0 +1,152 @@
+"""
+Job registry for Laika Dynamics RAG System
+Stores generation job state in SQLite so every API worker sees the same progress
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .models import SessionLocal, GenerationJob
+
+JSON_FIELDS = ("params", "dataset_stats")
+
+
+def _to_dict(job: GenerationJob) -> Dict[str, Any]:
+    """Serialize a job row for API responses"""
+    data = {
+        "job_id": job.job_id,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "params": json.loads(job.params) if job.params else {},
+        "rows_total": job.rows_total,
+        "rows_done": job.rows_done,
+        "rows_per_sec": job.rows_per_sec,
+        "worker_pid": job.worker_pid,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+    if job.filepath:
+        data["filepath"] = job.filepath
+    if job.dataset_stats:
+        data["dataset_stats"] = json.loads(job.dataset_stats)
+    return data
+
+
+def create_job(job_id: str, status: str, message: str, params: Dict[str, Any],
+               rows_total: int = 0) -> Dict[str, Any]:
+    """Insert a new job row"""
+    db = SessionLocal()
+    try:
+        job = GenerationJob(
+            job_id=job_id,
+            status=status,
+            progress=0.0,
+            message=message,
+            params=json.dumps(params),
+            rows_total=rows_total,
+            rows_done=0,
+            rows_per_sec=0.0
+        )
+        db.add(job)
+        db.commit()
+        return _to_dict(job)
+    finally:
+        db.close()
+
+
+def update_job(job_id: str, **fields) -> Optional[Dict[str, Any]]:
+    """Update a job row; rows_per_sec is derived from rows_done and the start time"""
+    db = SessionLocal()
+    try:
+        job = db.query(GenerationJob).filter(GenerationJob.job_id == job_id).first()
+        if not job:
+            return None
+
+        for key, value in fields.items():
+            if key in JSON_FIELDS and value is not None:
+                value = json.dumps(value)
+            setattr(job, key, value)
+
+        if "rows_done" in fields and job.started_at:
+            elapsed = (datetime.utcnow() - job.started_at).total_seconds()
+            job.rows_per_sec = round(job.rows_done / elapsed, 2) if elapsed > 0 else 0.0
+
+        db.commit()
+        return _to_dict(job)
+    finally:
+        db.close()
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        job = db.query(GenerationJob).filter(GenerationJob.job_id == job_id).first()
+        return _to_dict(job) if job else None
+    finally:
+        db.close()
+
+
+def get_job_status(job_id: str) -> Optional[str]:
+    """Read only the status column (used for cross-worker cancellation checks)"""
+    db = SessionLocal()
+    try:
+        row = db.query(GenerationJob.status).filter(GenerationJob.job_id == job_id).first()
+        return row[0] if row else None
+    finally:
+        db.close()
+
+
+def list_jobs(limit: int = 50) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        jobs = db.query(GenerationJob).order_by(GenerationJob.created_at.desc()).limit(limit).all()
+        return [_to_dict(job) for job in jobs]
+    finally:
+        db.close()
+
+
+def count_jobs(statuses: List[str], worker_pid: int = None) -> int:
+    db = SessionLocal()
+    try:
+        query = db.query(GenerationJob).filter(GenerationJob.status.in_(statuses))
+        if worker_pid is not None:
+            query = query.filter(GenerationJob.worker_pid == worker_pid)
+        return query.count()
+    finally:
+        db.close()
+
+
+def fail_orphaned_jobs(active_states: List[str], queued_state: str, error_state: str) -> int:
+    """Mark jobs whose owning API process no longer exists as failed"""
+    db = SessionLocal()
+    try:
+        failed = 0
+        jobs = db.query(GenerationJob).filter(
+            GenerationJob.status.in_(list(active_states) + [queued_state])
+        ).all()
+        for job in jobs:
+            if job.worker_pid and _pid_alive(job.worker_pid):
+                continue
+            job.status = error_state
+            job.message = "Interrupted: API worker exited before the job finished"
+            job.finished_at = datetime.utcnow()
+            failed += 1
+        db.commit()
+        return failed
+    finally:
+        db.close()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,259 @@
+"""
+Background job worker for Laika Dynamics RAG System
+Runs CPU-heavy data generation in separate processes so the API event loop stays responsive.
+Job state lives in the SQLite job registry so any API worker can report or cancel it.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from . import job_registry
+
+GENERATION_MAX_CONCURRENCY = int(os.getenv("GENERATION_MAX_CONCURRENCY", "1"))
+GENERATION_MAX_QUEUED = int(os.getenv("GENERATION_MAX_QUEUED", "8"))
+JOB_WORKER_START_METHOD = os.getenv("JOB_WORKER_START_METHOD", "spawn")
+
+# How often the dispatcher checks a running job for progress messages (seconds)
+PROGRESS_POLL_INTERVAL = 0.5
+
+# Job states
+QUEUED = "queued"
+GENERATING = "generating"
+INDEXING = "indexing"
+COMPLETED = "completed"
+ERROR = "error"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = {COMPLETED, ERROR, CANCELLED}
+ACTIVE_STATES = [GENERATING, INDEXING]
+
+
+class JobQueueFullError(Exception):
+    """Raised when the generation queue has no room for another job"""
+
+
+def run_generation_job(params: Dict[str, Any], conn) -> None:
+    """Generate and save a dataset inside a worker process, reporting progress over a pipe"""
+    try:
+        from .data_generator import WebContractDataGenerator
+        from .bulk_loader import bulk_load_contracts
+
+        generator = WebContractDataGenerator()
+        rows_total = max(params["base_size"] + params["synthetic_size"], 1)
+
+        def report(rows_done: int, message: str):
+            # Generation spans 10-60% of overall job progress
+            conn.send({"progress": 10 + 50 * rows_done / rows_total, "rows_done": rows_done, "message": message})
+
+        dataset = generator.generate_complete_dataset(
+            params["base_size"], params["synthetic_size"], progress_callback=report
+        )
+
+        conn.send({"progress": 60, "rows_done": len(dataset), "message": "Saving dataset..."})
+        filepath = generator.save_dataset(dataset, params["dataset_name"], params.get("format"))
+
+        conn.send({"progress": 70, "rows_done": len(dataset), "message": "Loading contracts into database..."})
+        load_stats = bulk_load_contracts(dataset)
+
+        conn.send({"result": {
+            "filepath": filepath,
+            "load_stats": load_stats,
+            "dataset_stats": {
+                "total_records": len(dataset),
+                "base_records": int((dataset['data_source'] == 'base').sum()),
+                "synthetic_records": int((dataset['data_source'] == 'synthetic').sum()),
+                "avg_contract_value": float(dataset['contract_value'].mean()),
+                "total_value": float(dataset['contract_value'].sum())
+            }
+        }})
+    except Exception as e:
+        conn.send({"error": str(e)})
+    finally:
+        conn.close()
+
+
+class GenerationJobWorker:
+    """Queue of data generation jobs executed in a bounded pool of worker processes
+    
+    The queue and concurrency limit are per API process; status, throughput
+    and cancellation go through the shared SQLite job registry.
+    """
+
+    def __init__(self, max_concurrency: int = None, max_queued: int = None,
+                 on_generated: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None):
+        self.max_concurrency = max_concurrency or GENERATION_MAX_CONCURRENCY
+        self.max_queued = max_queued or GENERATION_MAX_QUEUED
+        # Called in the API process once a dataset file exists (e.g. to index it)
+        self.on_generated = on_generated
+
+        self.pid = os.getpid()
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers: List[asyncio.Task] = []
+        self._context = multiprocessing.get_context(JOB_WORKER_START_METHOD)
+
+    def start(self):
+        """Start dispatcher tasks on the running event loop"""
+        if self._dispatchers:
+            return
+        self.pid = os.getpid()
+        orphaned = job_registry.fail_orphaned_jobs(ACTIVE_STATES, QUEUED, ERROR)
+        if orphaned:
+            print(f"⚠️ Marked {orphaned} interrupted generation jobs as failed")
+        self._queue = asyncio.Queue()
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch()) for _ in range(self.max_concurrency)
+        ]
+        print(f"✅ Generation job worker started ({self.max_concurrency} concurrent, {self.max_queued} queued)")
+
+    async def stop(self):
+        """Cancel dispatchers and terminate any running job processes"""
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        for job_id in list(self._processes):
+            self._terminate(job_id)
+            job_registry.update_job(job_id, status=ERROR, message="Interrupted: API worker shut down",
+                                    finished_at=datetime.utcnow())
+
+    def submit(self, base_size: int, synthetic_size: int, dataset_name: str,
+               fmt: Optional[str] = None) -> Dict[str, Any]:
+        """Queue a generation job and return its status record"""
+        if self._queue is None:
+            raise RuntimeError("Job worker not started")
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFullError(f"Generation queue is full ({self.max_queued} jobs waiting)")
+
+        job_id = uuid.uuid4().hex
+        job = job_registry.create_job(
+            job_id,
+            status=QUEUED,
+            message="Waiting for a free worker...",
+            params={
+                "base_size": base_size,
+                "synthetic_size": synthetic_size,
+                "dataset_name": dataset_name,
+                "format": fmt
+            },
+            rows_total=base_size + synthetic_size
+        )
+        job = job_registry.update_job(job_id, worker_pid=self.pid)
+        self._queue.put_nowait(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; returns False if it already finished
+        
+        Works from any API worker: the owning worker notices the status change
+        on its next poll and terminates the job process.
+        """
+        job = job_registry.get_job(job_id)
+        if not job or job["status"] in FINISHED_STATES:
+            return False
+
+        job_registry.update_job(job_id, status=CANCELLED, message="Cancelled by request",
+                                finished_at=datetime.utcnow())
+        self._terminate(job_id)
+        return True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return job_registry.get_job(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        return job_registry.list_jobs()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queued": self.max_queued,
+            "queued": job_registry.count_jobs([QUEUED]),
+            "running": job_registry.count_jobs(ACTIVE_STATES),
+            "running_in_this_worker": len(self._processes)
+        }
+
+    def _terminate(self, job_id: str):
+        process = self._processes.pop(job_id, None)
+        if process and process.is_alive():
+            process.terminate()
+            process.join(timeout=5)
+
+    def _cancelled(self, job_id: str) -> bool:
+        return job_registry.get_job_status(job_id) == CANCELLED
+
+    async def _dispatch(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                if job_registry.get_job_status(job_id) == QUEUED:
+                    await self._run(job_id)
+            except Exception as e:
+                if job_registry.get_job_status(job_id) in FINISHED_STATES:
+                    continue
+                job_registry.update_job(job_id, status=ERROR, message=f"Generation failed: {str(e)}",
+                                        finished_at=datetime.utcnow())
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = job_registry.update_job(job_id, status=GENERATING, progress=10,
+                                      message="Starting data generation...",
+                                      started_at=datetime.utcnow())
+
+        parent_conn, child_conn = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=run_generation_job, args=(job["params"], child_conn))
+        process.start()
+        child_conn.close()
+        self._processes[job_id] = process
+
+        result = None
+        try:
+            while True:
+                ready = await asyncio.to_thread(parent_conn.poll, PROGRESS_POLL_INTERVAL)
+                if self._cancelled(job_id):
+                    self._terminate(job_id)
+                    return
+                if not ready:
+                    if not process.is_alive():
+                        break
+                    continue
+                try:
+                    message = parent_conn.recv()
+                except EOFError:
+                    break
+                if "progress" in message:
+                    job_registry.update_job(job_id, progress=round(message["progress"], 1),
+                                            rows_done=message["rows_done"], message=message["message"])
+                elif "result" in message:
+                    result = message["result"]
+                elif "error" in message:
+                    raise RuntimeError(message["error"])
+        finally:
+            parent_conn.close()
+            self._processes.pop(job_id, None)
+            await asyncio.to_thread(process.join)
+
+        if result is None:
+            raise RuntimeError(f"Worker process exited with code {process.exitcode}")
+
+        if self.on_generated:
+            job_registry.update_job(job_id, status=INDEXING, progress=80,
+                                    message="Indexing in vector database...")
+            await self.on_generated(job_id, result)
+            if self._cancelled(job_id):
+                return
+
+        job_registry.update_job(
+            job_id,
+            status=COMPLETED,
+            progress=100,
+            message=f"Successfully generated {result['dataset_stats']['total_records']} records",
+            rows_done=result["dataset_stats"]["total_records"],
+            filepath=result["filepath"],
+            dataset_stats={**result["dataset_stats"], "database_load": result["load_stats"]},
+            finished_at=datetime.utcnow()
+        )
@@ -3,12 +3,10 @@ Enhanced Laika Dynamics RAG API
 Complete RAG system with CTGAN data generation, OpenAI integration, and vector search
 """
 
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from sqlalchemy.orm import Session
-import platform
-import psutil
 import os
 import pandas as pd
 import json
@@ -20,13 +18,29 @@ from pydantic import BaseModel
 # Import our modules
 from .models import create_tables, get_db, WebContract, DatasetMetadata
 from .data_generator import WebContractDataGenerator
-from .rag_service import RAGService
+from .rag_service import (
+    RAGService, QDRANT_PREFER_GRPC, QDRANT_GRPC_UPSERTS, QDRANT_TIMEOUT, QDRANT_RETRIES,
+    QDRANT_SEARCH_TIMEOUT, QDRANT_SEARCH_RETRIES, EMBEDDING_MIGRATION_ROWS_PER_SEC
+)
+from .embedding_registry import EMBEDDING_MODELS
+from .dataset_io import DATA_DIR, is_supported_dataset, detect_format, dataset_schema, iter_dataset_batches, read_dataset
+from .job_worker import GenerationJobWorker, JobQueueFullError
+from .bulk_loader import bulk_load_contracts, iter_stored_contracts
+from .index_checkpoints import list_checkpoints
+from . import analytics
+from .metrics import METRICS_ENABLED, render_latest
+from .system_monitor import SystemMonitor
+from .admission import admission, admission_stats
+from .pagination import encode_cursor, decode_cursor, InvalidCursorError
+from .responses import FastJSONResponse, ORJSON_AVAILABLE, add_compression, project_fields
+from .profiling import ProfilingMiddleware, PROFILED_PATHS, get_profiling_mode, set_profiling_mode, list_profiles
 
 # Initialize FastAPI
 app = FastAPI(
     title="🚀 Laika Dynamics RAG System", 
     version="2.0.0",
-    description="Advanced RAG System with CTGAN Data Generation & OpenAI Integration"
+    description="Advanced RAG System with CTGAN Data Generation & OpenAI Integration",
+    default_response_class=FastJSONResponse
 )
 
 app.add_middleware(
@@ -37,6 +51,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in sampling profiler for the RAG and upload endpoints (see /config/profiling)
+app.add_middleware(ProfilingMiddleware)
+
+# Compress large responses (search results, dataset listings, analytics)
+COMPRESSION_ENCODINGS = add_compression(app)
+
 # Initialize components
 data_generator = WebContractDataGenerator()
 rag_service = None  # Will be initialized with API key
@@ -45,17 +65,61 @@ rag_service = None  # Will be initialized with API key
 class QueryRequest(BaseModel):
     question: str
     max_results: int = 10
+    fields: Optional[List[str]] = None  # payload fields to return from /rag/search
+    offset: int = 0  # /rag/search page start
+    cursor: Optional[str] = None  # /rag/search next_cursor from the previous page
+    score_threshold: Optional[float] = None  # drop matches scoring below this
 
 class DataGenerationRequest(BaseModel):
     base_size: int = 500
     synthetic_size: int = 1000
     dataset_name: str = "web_contracts_dataset"
+    format: Optional[str] = None  # csv, parquet or feather (defaults to DATASET_FORMAT)
 
 class ConfigRequest(BaseModel):
     openai_api_key: Optional[str] = None
 
-# Global variables for tracking generation status
-generation_status = {"status": "idle", "progress": 0, "message": ""}
+class ProfilingConfigRequest(BaseModel):
+    mode: str  # off, header, all
+
+class ReindexRequest(BaseModel):
+    dataset: Optional[str] = None  # filename under data/ or data/uploads; defaults to the web_contracts table
+
+class EmbeddingMigrationRequest(BaseModel):
+    provider: Optional[str] = None  # openai or local; defaults to the configured provider
+    max_rows_per_sec: Optional[float] = None  # defaults to EMBEDDING_MIGRATION_ROWS_PER_SEC
+
+# Load embedding model and connect to Qdrant in the background at startup
+RAG_WARMUP = os.getenv("RAG_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Canned questions offered by /examples/queries and the UI
+EXAMPLE_QUERIES = [
+    "What are our highest value contracts?",
+    "Show me all e-commerce projects from tech companies",
+    "What technologies are most commonly used?",
+    "Which clients have the largest project budgets?",
+    "What's the average project timeline for web apps?",
+    "Show me all active contracts in the healthcare industry",
+    "What are the most common payment terms?",
+    "Which projects required API integration?",
+    "Show me contracts completed in the last 6 months",
+    "What's the typical hourly rate for complex projects?"
+]
+
+# Rows per batch when streaming uploaded datasets into the index
+UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "10000"))
+
+async def index_generated_dataset(job_id: str, result: Dict[str, Any]):
+    """Index a dataset produced by a generation job"""
+    if rag_service:
+        dataset = await asyncio.to_thread(read_dataset, result["filepath"])
+        await rag_service.index_contracts(dataset)
+
+# Resource stats are sampled in the background so /system never blocks
+system_monitor = SystemMonitor()
+
+# Generation runs in worker processes, off the API event loop
+job_worker = GenerationJobWorker(on_generated=index_generated_dataset)
 
 @app.on_event("startup")
 async def startup_event():
@@ -63,9 +127,22 @@ async def startup_event():
     create_tables()
     print("✅ Database tables created")
     
-    # Try to initialize RAG service with environment variable
+    # Try to initialize RAG service with environment variable (models load lazily)
     global rag_service
     rag_service = RAGService()
+    if RAG_WARMUP:
+        rag_service.start_warm_up(warm_queries=EXAMPLE_QUERIES)
+    
+    job_worker.start()
+    system_monitor.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and close pooled connections"""
+    await job_worker.stop()
+    system_monitor.stop()
+    if rag_service:
+        await rag_service.close()
 
 # ==================== BASIC ENDPOINTS ====================
 
@@ -88,12 +165,13 @@ async def root():
 @app.get("/health")
 async def health():
     return {
-        "status": "healthy",
+        "status": "starting" if rag_service and rag_service.warming_up else "healthy",
+        "ready": bool(rag_service and rag_service.ready) or not RAG_WARMUP,
         "version": "2.0.0",
         "components": {
             "api": "running",
             "database": "connected",
-            "vector_db": "available" if rag_service and rag_service.qdrant_client else "not_available",
+            "vector_db": "available" if rag_service and rag_service.vector_db_connected else "not_available",
             "openai": "configured" if rag_service and rag_service.use_openai else "not_configured"
         },
         "timestamp": datetime.now().isoformat()
@@ -102,35 +180,31 @@ async def health():
 @app.get("/system")
 async def system_info():
     try:
+        static = system_monitor.static_info()
+        sample = system_monitor.latest()
         return {
-            "system": {
-                "os": platform.system(),
-                "os_release": platform.release(),
-                "distribution": platform.platform(),
-                "architecture": platform.architecture()[0],
-                "machine": platform.machine(),
-                "processor": platform.processor(),
-                "python_version": platform.python_version(),
-                "hostname": platform.node()
-            },
+            "system": {key: value for key, value in static.items() if key != "cpu_count"},
             "resources": {
-                "cpu_count": psutil.cpu_count(),
-                "cpu_percent": psutil.cpu_percent(interval=1),
+                "cpu_count": static["cpu_count"],
+                "cpu_percent": sample["cpu_percent"],
+                "load_average": sample["load_average"],
                 "memory": {
-                    "total": f"{psutil.virtual_memory().total // (1024**3)}GB",
-                    "available": f"{psutil.virtual_memory().available // (1024**3)}GB",
-                    "percent": psutil.virtual_memory().percent
+                    "total": f"{sample['memory']['total'] // (1024**3)}GB",
+                    "available": f"{sample['memory']['available'] // (1024**3)}GB",
+                    "percent": sample["memory"]["percent"]
                 },
                 "disk": {
-                    "total": f"{psutil.disk_usage('/').total // (1024**3)}GB",
-                    "free": f"{psutil.disk_usage('/').free // (1024**3)}GB",
-                    "percent": psutil.disk_usage('/').percent
-                }
+                    "total": f"{sample['disk']['total'] // (1024**3)}GB",
+                    "free": f"{sample['disk']['free'] // (1024**3)}GB",
+                    "percent": sample["disk"]["percent"]
+                },
+                "process": sample["process"],
+                "sampled_at": sample["timestamp"]
             },
             "ai_services": {
                 "openai_configured": rag_service.use_openai if rag_service else False,
-                "vector_db_status": "connected" if rag_service and rag_service.qdrant_client else "disconnected",
-                "local_embeddings": "available" if rag_service and rag_service.local_model else "unavailable"
+                "vector_db_status": "connected" if rag_service and rag_service.vector_db_connected else "disconnected",
+                "local_embeddings": "available" if rag_service and rag_service.local_model_loaded else "unavailable"
             },
             "status": "operational",
             "timestamp": datetime.now().isoformat()
@@ -138,6 +212,24 @@ async def system_info():
     except Exception as e:
         return {"error": str(e), "status": "error"}
 
+@app.get("/system/history")
+async def system_history(limit: Optional[int] = None):
+    """Recent resource samples for dashboard charts"""
+    samples = system_monitor.series(limit)
+    return {
+        "interval_seconds": system_monitor.interval,
+        "samples": samples,
+        "count": len(samples)
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint for RAG pipeline metrics"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
+
 # ==================== CONFIGURATION ENDPOINTS ====================
 
 @app.post("/config/openai")
@@ -146,156 +238,221 @@ async def configure_openai(config: ConfigRequest):
     global rag_service
     try:
         if config.openai_api_key:
-            # Re-initialize RAG service with new API key
-            rag_service = RAGService(openai_api_key=config.openai_api_key)
+            # Rotate the key in place - loaded models and clients are kept
+            if rag_service:
+                rag_service.configure_openai(config.openai_api_key)
+            else:
+                rag_service = RAGService(openai_api_key=config.openai_api_key)
+            try:
+                embeddings = await rag_service.embedding_status()
+            except Exception as e:
+                embeddings = {"error": str(e)}
             return {
                 "status": "success",
                 "message": "OpenAI API key configured successfully",
-                "openai_enabled": rag_service.use_openai
+                "openai_enabled": rag_service.use_openai,
+                # Queries keep using the served collection's model until a migration swaps it
+                "embeddings": embeddings
             }
         else:
             return {"status": "error", "message": "No API key provided"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+async def embedding_status() -> Dict[str, Any]:
+    if not rag_service or not await rag_service.init_vector_storage():
+        return {}
+    try:
+        return await rag_service.embedding_status()
+    except Exception as e:
+        return {"error": str(e)}
+
 @app.get("/config/status")
 async def get_config_status():
     """Get current configuration status"""
     return {
         "openai_configured": rag_service.use_openai if rag_service else False,
-        "vector_db_available": bool(rag_service and rag_service.qdrant_client),
-        "local_embeddings_available": bool(rag_service and rag_service.local_model),
-        "collection_stats": rag_service.get_collection_stats() if rag_service else {}
+        "vector_db_available": bool(rag_service and rag_service.vector_db_connected),
+        "local_embeddings_available": bool(rag_service and rag_service.local_model_loaded),
+        "collection_stats": await rag_service.get_collection_stats() if rag_service else {},
+        "admission_control": admission_stats(),
+        "rag_query_coalescing": rag_service.coalescing_stats() if rag_service else {},
+        "query_routing": rag_service.routing_stats() if rag_service else {},
+        "query_cache": rag_service.query_cache_stats() if rag_service else {},
+        "embeddings": await embedding_status(),
+        "responses": {
+            "orjson": ORJSON_AVAILABLE,
+            "compression": COMPRESSION_ENCODINGS
+        },
+        "vector_db": {
+            "prefer_grpc": QDRANT_PREFER_GRPC,
+            "grpc_upserts": QDRANT_GRPC_UPSERTS,
+            "timeout_seconds": QDRANT_TIMEOUT,
+            "retries": QDRANT_RETRIES,
+            "search_timeout_seconds": QDRANT_SEARCH_TIMEOUT,
+            "search_retries": QDRANT_SEARCH_RETRIES,
+            "breaker_open": rag_service.qdrant_breaker_open if rag_service else False
+        }
+    }
+
+@app.get("/config/profiling")
+async def get_profiling_config():
+    """Current profiling mode and stored profiles"""
+    return {
+        "mode": get_profiling_mode(),
+        "profiled_paths": sorted(PROFILED_PATHS),
+        "header": "X-Profile: 1",
+        "profiles": list_profiles()
     }
 
+@app.post("/config/profiling")
+async def configure_profiling(config: ProfilingConfigRequest):
+    """Switch request profiling off, on for requests sending X-Profile: 1, or on for all requests"""
+    try:
+        set_profiling_mode(config.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "mode": get_profiling_mode()}
+
 # ==================== DATA GENERATION ENDPOINTS ====================
 
 @app.post("/data/generate")
-async def generate_dataset(request: DataGenerationRequest, background_tasks: BackgroundTasks):
-    """Generate synthetic dataset using CTGAN"""
+async def generate_dataset(request: DataGenerationRequest):
+    """Generate synthetic dataset using CTGAN in a background worker process"""
     try:
-        # Start background task for data generation
-        background_tasks.add_task(
-            generate_data_background, 
+        job = job_worker.submit(
             request.base_size, 
             request.synthetic_size, 
-            request.dataset_name
+            request.dataset_name,
+            request.format
         )
         
         return {
             "status": "started",
-            "message": f"Data generation started: {request.base_size} base + {request.synthetic_size} synthetic records",
+            "job_id": job["job_id"],
+            "message": f"Data generation queued: {request.base_size} base + {request.synthetic_size} synthetic records",
             "dataset_name": request.dataset_name,
-            "check_progress_url": "/data/generation-status"
+            "check_progress_url": f"/data/generation-status/{job['job_id']}"
         }
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-async def generate_data_background(base_size: int, synthetic_size: int, dataset_name: str):
-    """Background task for data generation"""
-    global generation_status
-    
-    try:
-        generation_status = {"status": "generating", "progress": 10, "message": "Starting data generation..."}
-        
-        # Generate dataset
-        generation_status = {"status": "generating", "progress": 30, "message": "Generating base dataset..."}
-        dataset = data_generator.generate_complete_dataset(base_size, synthetic_size)
-        
-        generation_status = {"status": "generating", "progress": 60, "message": "Saving dataset..."}
-        filepath = data_generator.save_dataset(dataset, f"{dataset_name}.csv")
-        
-        # Index in vector database if RAG service is available
-        if rag_service:
-            generation_status = {"status": "generating", "progress": 80, "message": "Indexing in vector database..."}
-            await rag_service.index_contracts(dataset)
-        
-        generation_status = {
-            "status": "completed", 
-            "progress": 100, 
-            "message": f"Successfully generated {len(dataset)} records",
-            "filepath": filepath,
-            "dataset_stats": {
-                "total_records": len(dataset),
-                "base_records": len(dataset[dataset['data_source'] == 'base']),
-                "synthetic_records": len(dataset[dataset['data_source'] == 'synthetic']),
-                "avg_contract_value": float(dataset['contract_value'].mean()),
-                "total_value": float(dataset['contract_value'].sum())
-            }
-        }
-        
-    except Exception as e:
-        generation_status = {
-            "status": "error", 
-            "progress": 0, 
-            "message": f"Generation failed: {str(e)}"
-        }
-
 @app.get("/data/generation-status")
-async def get_generation_status():
-    """Get current data generation status"""
-    return generation_status
+async def get_generation_status(job_id: Optional[str] = None):
+    """Get data generation status for one job, or the most recent job plus recent jobs"""
+    if job_id:
+        return await get_generation_job_status(job_id)
+    
+    jobs = job_worker.list_jobs()
+    latest = jobs[0] if jobs else {"status": "idle", "progress": 0, "message": ""}
+    return {**latest, "jobs": jobs, "worker": job_worker.stats()}
+
+@app.get("/data/generation-status/{job_id}")
+async def get_generation_job_status(job_id: str):
+    """Get progress, timestamps and throughput for a single generation job"""
+    job = job_worker.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+@app.post("/data/jobs/{job_id}/cancel")
+async def cancel_generation_job(job_id: str):
+    """Cancel a queued or running generation job"""
+    if not job_worker.get(job_id):
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if not job_worker.cancel(job_id):
+        return {"status": "error", "message": "Job already finished", "job_id": job_id}
+    return {"status": "cancelled", "job_id": job_id}
 
 @app.get("/data/datasets")
 async def list_datasets():
     """List available datasets"""
     try:
         datasets = []
-        data_dir = "data"
-        if os.path.exists(data_dir):
-            for filename in os.listdir(data_dir):
-                if filename.endswith('.csv'):
-                    filepath = os.path.join(data_dir, filename)
+        for directory in (DATA_DIR, os.path.join(DATA_DIR, "uploads")):
+            if not os.path.exists(directory):
+                continue
+            for filename in os.listdir(directory):
+                if is_supported_dataset(filename):
+                    filepath = os.path.join(directory, filename)
                     stats = os.stat(filepath)
-                    datasets.append({
+                    entry = {
                         "filename": filename,
+                        "path": filepath,
                         "size_mb": round(stats.st_size / (1024*1024), 2),
                         "created": datetime.fromtimestamp(stats.st_ctime).isoformat(),
                         "modified": datetime.fromtimestamp(stats.st_mtime).isoformat()
-                    })
+                    }
+                    entry.update(dataset_schema(filepath))
+                    datasets.append(entry)
         
         return {"datasets": datasets, "count": len(datasets)}
     except Exception as e:
         return {"error": str(e)}
 
 @app.post("/data/upload")
-async def upload_dataset(file: UploadFile = File(...)):
-    """Upload custom dataset"""
+async def upload_dataset(file: UploadFile = File(...), _admitted: None = Depends(admission("data_upload"))):
+    """Upload custom dataset (CSV, Parquet or Arrow/Feather)"""
     try:
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="Only CSV files are supported")
+        if not is_supported_dataset(file.filename):
+            raise HTTPException(status_code=400, detail="Only CSV, Parquet and Feather/Arrow files are supported")
         
         # Save uploaded file
-        upload_dir = "data/uploads"
+        upload_dir = os.path.join(DATA_DIR, "uploads")
         os.makedirs(upload_dir, exist_ok=True)
-        filepath = os.path.join(upload_dir, file.filename)
+        filepath = os.path.join(upload_dir, os.path.basename(file.filename))
         
         with open(filepath, "wb") as buffer:
             content = await file.read()
             buffer.write(content)
         
-        # Read and validate CSV
-        df = pd.read_csv(filepath)
+        # Parse the file once, off the event loop; each batch feeds both the
+        # structured store and the vector index
+        iterator = iter_dataset_batches(filepath, batch_size=UPLOAD_BATCH_SIZE)
+        load_stats = {"loaded": 0, "skipped": 0, "batches": 0, "seconds": 0.0}
+        records = 0
+        columns = []
+        while True:
+            batch = await asyncio.to_thread(next, iterator, None)
+            if batch is None:
+                break
+            records += len(batch)
+            columns = columns or list(batch.columns)
+            
+            batch_stats = await asyncio.to_thread(bulk_load_contracts, batch)
+            for key in load_stats:
+                load_stats[key] += batch_stats[key]
+            
+            # Index in vector database if RAG service is available
+            if rag_service:
+                await rag_service.index_contracts(batch)
         
-        # Index in vector database if RAG service is available
-        if rag_service:
-            await rag_service.index_contracts(df)
+        load_stats["seconds"] = round(load_stats["seconds"], 3)
+        load_stats["rows_per_sec"] = (
+            round(load_stats["loaded"] / load_stats["seconds"], 1) if load_stats["seconds"] > 0 else 0.0
+        )
         
         return {
             "status": "success",
             "message": f"Dataset uploaded and indexed successfully",
             "filename": file.filename,
-            "records": len(df),
-            "columns": list(df.columns)
+            "format": detect_format(filepath),
+            "records": records,
+            "columns": columns,
+            "database_load": load_stats
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # ==================== RAG QUERY ENDPOINTS ====================
 
 @app.post("/rag/query")
-async def rag_query(request: QueryRequest):
+async def rag_query(request: QueryRequest, _admitted: None = Depends(admission("rag_query"))):
     """Perform RAG query with semantic search and AI response"""
     if not rag_service:
         raise HTTPException(status_code=503, detail="RAG service not available")
@@ -307,18 +464,39 @@ async def rag_query(request: QueryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/rag/search")
-async def semantic_search(request: QueryRequest):
-    """Perform semantic search without AI response"""
+async def semantic_search(request: QueryRequest, _admitted: None = Depends(admission("rag_search"))):
+    """Perform semantic search without AI response (paginated by offset or cursor)"""
     if not rag_service:
         raise HTTPException(status_code=503, detail="RAG service not available")
     
+    offset = request.offset
+    score_threshold = request.score_threshold
+    if request.cursor:
+        try:
+            page = decode_cursor(request.cursor, request.question)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        offset = page["offset"]
+        score_threshold = page["score_threshold"]
+    if offset < 0 or request.max_results < 1:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and max_results >= 1")
+    
     try:
-        results = await rag_service.semantic_search(request.question, request.max_results)
-        return {
+        results = await rag_service.semantic_search(
+            request.question, request.max_results, request.fields,
+            offset=offset, score_threshold=score_threshold
+        )
+        next_offset = offset + len(results)
+        has_more = len(results) == request.max_results
+        # Returned directly so the payloads skip FastAPI's generic encoder
+        return FastJSONResponse({
             "query": request.question,
-            "results": results,
-            "count": len(results)
-        }
+            "results": project_fields(results, request.fields),
+            "count": len(results),
+            "offset": offset,
+            "next_offset": next_offset if has_more else None,
+            "next_cursor": encode_cursor(request.question, next_offset, score_threshold) if has_more else None
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -328,41 +506,114 @@ async def get_rag_stats():
     if not rag_service:
         return {"error": "RAG service not available"}
     
-    return rag_service.get_collection_stats()
+    return await rag_service.get_collection_stats()
+
+@app.post("/rag/reindex")
+async def reindex(request: ReindexRequest):
+    """Rebuild the vector index into a new collection version, then swap the query alias to it"""
+    if not rag_service:
+        raise HTTPException(status_code=503, detail="RAG service not available")
+    
+    if request.dataset:
+        filename = os.path.basename(request.dataset)
+        candidates = [os.path.join(DATA_DIR, filename), os.path.join(DATA_DIR, "uploads", filename)]
+        filepath = next((path for path in candidates if os.path.exists(path)), None)
+        if not filepath or not is_supported_dataset(filename):
+            raise HTTPException(status_code=404, detail=f"Dataset not found: {request.dataset}")
+        batches = iter_dataset_batches(filepath, batch_size=UPLOAD_BATCH_SIZE)
+    else:
+        batches = iter_stored_contracts(batch_size=UPLOAD_BATCH_SIZE)
+    
+    if not await rag_service.start_reindex(batches, source=os.path.basename(request.dataset) if request.dataset else "web_contracts"):
+        raise HTTPException(status_code=409, detail="A re-index is already running")
+    
+    return {"status": "started", "source": request.dataset or "web_contracts table"}
+
+@app.get("/rag/collections")
+async def list_collections():
+    """Collection versions, the one the alias serves, re-index status and indexing checkpoints"""
+    if not rag_service:
+        return {"error": "RAG service not available"}
+    
+    try:
+        return {
+            "alias": rag_service.collection_name,
+            "serving": await rag_service.get_alias_target(),
+            "versions": await rag_service.list_collection_versions(),
+            "reindex": rag_service.reindex_status,
+            "checkpoints": await asyncio.to_thread(list_checkpoints, 20)
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.post("/rag/migrate-embeddings")
+async def migrate_embeddings(request: EmbeddingMigrationRequest):
+    """Re-embed the web_contracts table into a new collection with another model, at a throttled rate
+    
+    The current collection keeps serving queries until the new one is complete and swapped in.
+    """
+    if not rag_service:
+        raise HTTPException(status_code=503, detail="RAG service not available")
+    
+    provider = request.provider or rag_service.embedding_provider
+    if provider not in EMBEDDING_MODELS:
+        raise HTTPException(status_code=400, detail=f"Unknown embedding provider: {provider}")
+    if provider == "openai" and not rag_service.openai_client:
+        raise HTTPException(status_code=400, detail="Configure an OpenAI API key before migrating to OpenAI embeddings")
+    
+    status = await rag_service.embedding_status()
+    if status["serving_provider"] == provider:
+        raise HTTPException(status_code=400, detail=f"The served collection already uses {provider} embeddings")
+    
+    max_rows_per_sec = request.max_rows_per_sec or EMBEDDING_MIGRATION_ROWS_PER_SEC
+    started = await rag_service.start_reindex(
+        iter_stored_contracts(batch_size=UPLOAD_BATCH_SIZE),
+        source="web_contracts",
+        provider=provider,
+        max_rows_per_sec=max_rows_per_sec
+    )
+    if not started:
+        raise HTTPException(status_code=409, detail="A re-index is already running")
+    
+    return {
+        "status": "started",
+        "from_provider": status["serving_provider"],
+        "to_provider": provider,
+        "model": EMBEDDING_MODELS[provider][0],
+        "max_rows_per_sec": max_rows_per_sec
+    }
+
+@app.post("/rag/collections/rollback")
+async def rollback_collection():
+    """Serve the previous collection version again"""
+    if not rag_service:
+        raise HTTPException(status_code=503, detail="RAG service not available")
+    
+    try:
+        return await rag_service.rollback_alias()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 # ==================== ANALYTICS ENDPOINTS ====================
 
 @app.get("/analytics/overview")
 async def analytics_overview():
-    """Get analytics overview of contract data"""
+    """Get analytics overview of contract data from the materialized aggregates"""
     try:
-        # This would typically query the database
-        # For demo, return sample analytics
-        return {
-            "total_contracts": 2500,
-            "total_value": 12500000.00,
-            "avg_contract_value": 50000.00,
-            "top_industries": [
-                {"industry": "Technology", "count": 450, "percentage": 18.0},
-                {"industry": "Healthcare", "count": 380, "percentage": 15.2},
-                {"industry": "Finance", "count": 320, "percentage": 12.8}
-            ],
-            "contract_types": [
-                {"type": "website", "count": 800, "percentage": 32.0},
-                {"type": "web_app", "count": 600, "percentage": 24.0},
-                {"type": "ecommerce", "count": 450, "percentage": 18.0}
-            ],
-            "status_distribution": [
-                {"status": "completed", "count": 1200, "percentage": 48.0},
-                {"status": "active", "count": 800, "percentage": 32.0},
-                {"status": "proposal", "count": 500, "percentage": 20.0}
-            ],
-            "monthly_revenue": [
-                {"month": "2024-01", "revenue": 980000},
-                {"month": "2024-02", "revenue": 1200000},
-                {"month": "2024-03", "revenue": 1350000}
-            ]
-        }
+        overview = await asyncio.to_thread(analytics.get_overview)
+        overview["timestamp"] = datetime.now().isoformat()
+        return overview
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/analytics/consistency")
+async def analytics_consistency(repair: bool = False):
+    """Compare materialized aggregates with a full recompute (optionally rebuilding them)"""
+    try:
+        report = await asyncio.to_thread(analytics.check_consistency)
+        if repair and not report["consistent"]:
+            report["repair"] = await asyncio.to_thread(analytics.rebuild_aggregates)
+        return report
     except Exception as e:
         return {"error": str(e)}
 
@@ -400,18 +651,7 @@ async def ui_redirect():
 async def example_queries():
     """Get example RAG queries for testing"""
     return {
-        "example_queries": [
-            "What are our highest value contracts?",
-            "Show me all e-commerce projects from tech companies",
-            "What technologies are most commonly used?",
-            "Which clients have the largest project budgets?",
-            "What's the average project timeline for web apps?",
-            "Show me all active contracts in the healthcare industry",
-            "What are the most common payment terms?",
-            "Which projects required API integration?",
-            "Show me contracts completed in the last 6 months",
-            "What's the typical hourly rate for complex projects?"
-        ],
+        "example_queries": EXAMPLE_QUERIES,
         "sample_data_topics": [
             "E-commerce platforms",
             "Mobile app development", 
@@ -0,0 +1,129 @@
+"""
+Prometheus metrics for Laika Dynamics RAG System
+Per-stage latency histograms and counters for the RAG hot path
+"""
+
+import functools
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Tuple
+
+# Metrics are optional - without prometheus_client (or with METRICS_ENABLED=false)
+# every helper below is a no-op and decorated functions are returned unchanged
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+    )
+    from prometheus_client import multiprocess
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+METRICS_ENABLED = PROMETHEUS_AVAILABLE and os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Set by gunicorn deployments so all workers' samples are aggregated on scrape
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+if METRICS_ENABLED:
+    STAGE_LATENCY = Histogram(
+        "rag_stage_duration_seconds",
+        "Latency of RAG pipeline stages",
+        ["stage"],
+        buckets=LATENCY_BUCKETS
+    )
+    EMBEDDING_BATCH_SIZE = Histogram(
+        "rag_embedding_batch_size",
+        "Number of texts per embedding call",
+        ["backend"],
+        buckets=BATCH_BUCKETS
+    )
+    TOKENS = Counter(
+        "rag_openai_tokens_total",
+        "OpenAI tokens consumed",
+        ["model", "kind"]
+    )
+    ERRORS = Counter(
+        "rag_errors_total",
+        "Errors raised or handled in RAG pipeline stages",
+        ["stage"]
+    )
+    CACHE_REQUESTS = Counter(
+        "rag_cache_requests_total",
+        "Cache lookups by cache and result",
+        ["cache", "result"]
+    )
+
+
+def track_stage(stage: str) -> Callable:
+    """Decorator recording an async function's duration in the stage latency histogram"""
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        histogram = STAGE_LATENCY.labels(stage=stage)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                ERRORS.labels(stage=stage).inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Context manager form of track_stage for sub-steps inside a function"""
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - started)
+
+
+def observe_batch(backend: str, size: int):
+    if METRICS_ENABLED:
+        EMBEDDING_BATCH_SIZE.labels(backend=backend).observe(size)
+
+
+def count_tokens(model: str, usage):
+    """Record token usage from an OpenAI response's usage object"""
+    if not METRICS_ENABLED or usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        amount = getattr(usage, kind, None)
+        if amount:
+            TOKENS.labels(model=model, kind=kind.replace("_tokens", "")).inc(amount)
+
+
+def count_error(stage: str):
+    if METRICS_ENABLED:
+        ERRORS.labels(stage=stage).inc()
+
+
+def count_cache(cache: str, hit: bool):
+    if METRICS_ENABLED:
+        CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Serialize current metrics in the Prometheus text exposition format"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -3,10 +3,10 @@ Database models for Laika Dynamics RAG System
 Web Contracting Data Schema
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from datetime import datetime
 import os
 
@@ -23,7 +23,7 @@ class WebContract(Base):
     client_name = Column(String(200))
     client_email = Column(String(100))
     client_company = Column(String(200))
-    contract_type = Column(String(50))  # website, mobile_app, ecommerce, etc.
+    contract_type = Column(String(50), index=True)  # website, mobile_app, ecommerce, etc.
     
     # Project Specifications
     project_title = Column(String(300))
@@ -32,8 +32,8 @@ class WebContract(Base):
     technologies = Column(String(500))  # JSON string of tech stack
     
     # Financial Details
-    contract_value = Column(Float)
-    hourly_rate = Column(Float)
+    contract_value = Column(Float, index=True)
+    hourly_rate = Column(Float, index=True)
     estimated_hours = Column(Integer)
     payment_terms = Column(String(100))
     
@@ -43,7 +43,7 @@ class WebContract(Base):
     actual_completion = Column(DateTime, nullable=True)
     
     # Status & Progress
-    status = Column(String(50))  # proposal, active, completed, cancelled
+    status = Column(String(50), index=True)  # proposal, active, completed, cancelled
     progress_percentage = Column(Float, default=0.0)
     
     # Requirements & Features
@@ -55,8 +55,8 @@ class WebContract(Base):
     
     # Location & Demographics
     client_location = Column(String(100))
-    client_industry = Column(String(100))
-    project_complexity = Column(String(20))  # simple, medium, complex, enterprise
+    client_industry = Column(String(100), index=True)
+    project_complexity = Column(String(20), index=True)  # simple, medium, complex, enterprise
     
     # Additional Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -75,14 +75,109 @@ class DatasetMetadata(Base):
     file_path = Column(String(300), nullable=True)
     description = Column(Text, nullable=True)
 
+class ContractAggregate(Base):
+    """Materialized contract aggregates, maintained incrementally by the bulk loader"""
+    __tablename__ = "contract_aggregates"
+    __table_args__ = (UniqueConstraint("dimension", "key", name="uq_contract_aggregate"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    dimension = Column(String(50))  # total, industry, contract_type, status, month
+    key = Column(String(200))
+    count = Column(Integer, default=0)
+    value_sum = Column(Float, default=0.0)
+    hours_sum = Column(Float, default=0.0)
+    hourly_rate_sum = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class GenerationJob(Base):
+    """Data generation job shared by all API workers"""
+    __tablename__ = "generation_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(32), unique=True, index=True)
+    status = Column(String(20), index=True)  # queued, generating, indexing, completed, error, cancelled
+    progress = Column(Float, default=0.0)
+    message = Column(Text, nullable=True)
+    params = Column(Text)  # JSON string of request parameters
+    
+    # Throughput
+    rows_total = Column(Integer, default=0)
+    rows_done = Column(Integer, default=0)
+    rows_per_sec = Column(Float, default=0.0)
+    
+    # Result
+    filepath = Column(String(300), nullable=True)
+    dataset_stats = Column(Text, nullable=True)  # JSON string
+    
+    # Ownership & timeline
+    worker_pid = Column(Integer, nullable=True)  # API process running the job
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+class IndexCheckpoint(Base):
+    """Progress of indexing one dataset into one Qdrant collection, for resuming after failures"""
+    __tablename__ = "index_checkpoints"
+    __table_args__ = (UniqueConstraint("fingerprint", "collection_name", name="uq_index_checkpoint"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(64), index=True)  # content hash of the dataset being indexed
+    collection_name = Column(String(100))  # concrete collection (never the alias)
+    status = Column(String(20))  # running, completed, failed
+    rows_total = Column(Integer, default=0)
+    rows_done = Column(Integer, default=0)  # rows embedded and upserted, always a batch boundary
+    batches_done = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CollectionEmbedding(Base):
+    """Embedding model a Qdrant collection was built with; queries must embed with the same one"""
+    __tablename__ = "collection_embeddings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    collection_name = Column(String(100), unique=True, index=True)
+    provider = Column(String(20))  # openai, local
+    model = Column(String(200))
+    dimension = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class QuestionLog(Base):
+    """How often each normalized RAG question was asked per day; feeds the startup cache warm-up"""
+    __tablename__ = "question_log"
+    __table_args__ = (UniqueConstraint("normalized_question", "day", name="uq_question_log_day"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    normalized_question = Column(String(500), index=True)
+    question = Column(Text)  # latest wording, replayed by the warm-up
+    day = Column(String(10), index=True)  # YYYY-MM-DD (UTC)
+    count = Column(Integer, default=0)
+    last_asked_at = Column(DateTime, default=datetime.utcnow)
+
 # Database setup
-DATABASE_URL = "sqlite:///./laika_rag.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./laika_rag.db")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets API workers read while a bulk load or job update is writing"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    # Memory-map the database file so record lookups for search hits read straight from the page cache
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist; the query router's filters and rankings need them
+    for index in WebContract.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
 
 def get_db():
     """Database session dependency"""
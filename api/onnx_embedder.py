@@ -0,0 +1,165 @@
+"""
+ONNX Runtime embedding backend for Laika Dynamics RAG System
+Runs an exported (optionally int8-quantized) sentence-transformers model on CPU without PyTorch
+"""
+
+import os
+import platform
+from typing import List, Optional
+
+import numpy as np
+
+# ONNX Runtime is optional - without it the local model stays on sentence-transformers
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("models", "onnx"))
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() in ("1", "true", "yes")
+ONNX_QUANTIZATION_TARGET = os.getenv("ONNX_QUANTIZATION_TARGET", "auto")  # auto, avx2, avx512, avx512_vnni, arm64
+QUANTIZATION_TARGETS = ("arm64", "avx2", "avx512", "avx512_vnni")
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))  # 0 = physical cores
+ONNX_MAX_SEQ_LENGTH = int(os.getenv("ONNX_MAX_SEQ_LENGTH", "256"))  # all-MiniLM-L6-v2 truncates at 256
+
+
+def hub_model_id(model_name: str) -> str:
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def _cpu_flags() -> set:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def quantization_target() -> str:
+    """int8 kernel set for this CPU: ONNX_QUANTIZATION_TARGET, or detected when it is "auto"
+
+    Raises instead of guessing: a model quantized for the wrong instruction set is
+    slow (or unusable) on this host.
+    """
+    if ONNX_QUANTIZATION_TARGET != "auto":
+        if ONNX_QUANTIZATION_TARGET not in QUANTIZATION_TARGETS:
+            raise ValueError(f"ONNX_QUANTIZATION_TARGET must be auto or one of {', '.join(QUANTIZATION_TARGETS)}")
+        return ONNX_QUANTIZATION_TARGET
+
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return "arm64"
+    flags = _cpu_flags()
+    if "avx512_vnni" in flags or "avx512vnni" in flags:
+        return "avx512_vnni"
+    if {"avx512f", "avx512bw"} <= flags:
+        return "avx512"
+    if "avx2" in flags:
+        return "avx2"
+    raise RuntimeError(
+        f"Could not detect an int8 quantization target for this {machine or 'unknown'} CPU; "
+        f"set ONNX_QUANTIZATION_TARGET ({', '.join(QUANTIZATION_TARGETS)}) or ONNX_QUANTIZE=false"
+    )
+
+
+def model_directory(model_name: str, quantize: bool = ONNX_QUANTIZE) -> str:
+    # int8 weights are quantized for one instruction set, so each target gets its own copy
+    suffix = f"int8-{quantization_target()}" if quantize else "fp32"
+    return os.path.join(ONNX_MODEL_DIR, f"{hub_model_id(model_name).replace('/', '__')}-{suffix}")
+
+
+def export_onnx_model(model_name: str, quantize: bool = ONNX_QUANTIZE) -> str:
+    """Export the model to ONNX (and quantize weights to int8) once; returns the model directory
+
+    Needs optimum[onnxruntime]; only the first start pays for this, later loads
+    read the cached files.
+    """
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    fp32_dir = model_directory(model_name, quantize=False)
+    if not os.path.exists(os.path.join(fp32_dir, "model.onnx")):
+        print(f"🔄 Exporting {model_name} to ONNX...")
+        model = ORTModelForFeatureExtraction.from_pretrained(hub_model_id(model_name), export=True)
+        model.save_pretrained(fp32_dir)
+        AutoTokenizer.from_pretrained(hub_model_id(model_name)).save_pretrained(fp32_dir)
+    if not quantize:
+        return fp32_dir
+
+    target = quantization_target()
+    int8_dir = model_directory(model_name, quantize=True)
+    if not os.path.exists(os.path.join(int8_dir, "model_quantized.onnx")):
+        print(f"🔄 Quantizing {model_name} to int8 ({target})...")
+        # Dynamic quantization: int8 weights, activations quantized on the fly - no calibration data needed
+        qconfig = getattr(AutoQuantizationConfig, target)(is_static=False, per_channel=False)
+        ORTQuantizer.from_pretrained(fp32_dir).quantize(save_dir=int8_dir, quantization_config=qconfig)
+        AutoTokenizer.from_pretrained(fp32_dir).save_pretrained(int8_dir)
+    return int8_dir
+
+
+class OnnxEmbedder:
+    """Drop-in for SentenceTransformer.encode: mean pooling + L2 normalization over ONNX outputs"""
+
+    def __init__(self, model_name: str, quantize: bool = ONNX_QUANTIZE, intra_op_threads: Optional[int] = None):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime is not installed")
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.quantize = quantize
+        directory = model_directory(model_name, quantize)
+        model_file = os.path.join(directory, "model_quantized.onnx" if quantize else "model.onnx")
+        if not os.path.exists(model_file):
+            directory = export_onnx_model(model_name, quantize)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=ONNX_MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        threads = intra_op_threads or ONNX_INTRA_OP_THREADS or _physical_cores()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        hidden_size = self.session.get_outputs()[0].shape[-1]
+        self.dimension = hidden_size if isinstance(hidden_size, int) else 384
+        self.intra_op_threads = threads
+        print(f"✅ ONNX Runtime embedder loaded: {model_file} ({threads} threads)")
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        # Longest first, as SentenceTransformer.encode does, so each batch pads against similar lengths
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        output = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            output[batch] = self._encode_batch([texts[i] for i in batch])
+        return output
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+
+def _physical_cores() -> int:
+    try:
+        import psutil
+        return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    except ImportError:
+        return os.cpu_count() or 1
@@ -0,0 +1,36 @@
+"""
+Search pagination for Laika Dynamics RAG System
+Opaque cursors that carry the offset and filters of the next result page
+"""
+
+import base64
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor is malformed or belongs to a different query"""
+
+
+def _query_fingerprint(query: str) -> str:
+    return hashlib.sha1(" ".join(query.lower().split()).encode()).hexdigest()[:12]
+
+
+def encode_cursor(query: str, offset: int, score_threshold: Optional[float] = None) -> str:
+    """Cursor for the page starting at offset"""
+    state = {"q": _query_fingerprint(query), "o": offset, "t": score_threshold}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, query: str) -> Dict[str, Any]:
+    """Return {"offset", "score_threshold"} for a cursor issued for this query"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        offset = int(state["o"])
+    except Exception:
+        raise InvalidCursorError("Malformed cursor")
+    if state.get("q") != _query_fingerprint(query) or offset < 0:
+        raise InvalidCursorError("Cursor does not belong to this query")
+    return {"offset": offset, "score_threshold": state.get("t")}
@@ -0,0 +1,196 @@
+"""
+Per-request profiling for Laika Dynamics RAG System
+Opt-in sampling profiler that writes flame-graph-compatible folded stacks to logs/profiles/
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("logs", "profiles"))
+PROFILING_MODE = os.getenv("PROFILING_MODE", "off").lower()  # off, header, all
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000
+PROFILING_MAX_CONCURRENT = int(os.getenv("PROFILING_MAX_CONCURRENT", "2"))
+PROFILE_HEADER = "x-profile"
+# The admin toggle writes the mode here so every worker process picks it up
+PROFILING_MODE_FILE = os.getenv("PROFILING_MODE_FILE", os.path.join(PROFILE_DIR, "mode"))
+PROFILING_MODE_REFRESH_SECONDS = float(os.getenv("PROFILING_MODE_REFRESH_SECONDS", "1"))
+
+PROFILED_PATHS = {"/rag/query", "/rag/search", "/data/upload"}
+PROFILING_MODES = ("off", "header", "all")
+
+# Mode of this worker: PROFILING_MODE until the mode file says otherwise
+_default_mode = PROFILING_MODE if PROFILING_MODE in PROFILING_MODES else "off"
+_mode = _default_mode
+_mode_file_mtime = None
+_mode_checked = 0.0
+
+# Leaf functions of an idle executor thread - not interesting in a request profile
+IDLE_LEAVES = {"wait", "get", "select", "poll", "_worker"}
+
+
+class StackSampler:
+    """Samples Python stacks of the event loop thread and busy executor threads"""
+
+    def __init__(self, loop_thread_id: int, interval: float = None):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval or PROFILING_INTERVAL
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                name = names.get(thread_id, str(thread_id))
+                is_loop = thread_id == self.loop_thread_id
+                if not is_loop and not name.startswith("asyncio_"):
+                    continue
+                if not is_loop and frame.f_code.co_name in IDLE_LEAVES:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append("event-loop" if is_loop else name)
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Brendan Gregg's folded-stack format, accepted by flamegraph.pl and speedscope"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.counts.most_common()) + "\n"
+
+
+def _refresh_mode(force: bool = False) -> str:
+    """Re-read the shared mode file, at most every PROFILING_MODE_REFRESH_SECONDS unless forced"""
+    global _mode, _mode_file_mtime, _mode_checked
+    now = time.monotonic()
+    if not force and now - _mode_checked < PROFILING_MODE_REFRESH_SECONDS:
+        return _mode
+    _mode_checked = now
+    try:
+        mtime = os.stat(PROFILING_MODE_FILE).st_mtime_ns
+    except OSError:
+        _mode, _mode_file_mtime = _default_mode, None
+        return _mode
+    if mtime != _mode_file_mtime:
+        try:
+            with open(PROFILING_MODE_FILE) as f:
+                mode = f.read().strip()
+        except OSError:
+            return _mode
+        _mode = mode if mode in PROFILING_MODES else _default_mode
+        _mode_file_mtime = mtime
+    return _mode
+
+
+def get_profiling_mode() -> str:
+    return _refresh_mode(force=True)
+
+
+def set_profiling_mode(mode: str):
+    """Admin toggle: off, header (profile requests sending X-Profile: 1) or all
+
+    Applies to every worker within PROFILING_MODE_REFRESH_SECONDS.
+    """
+    if mode not in PROFILING_MODES:
+        raise ValueError(f"Unknown profiling mode: {mode}")
+    os.makedirs(os.path.dirname(PROFILING_MODE_FILE) or ".", exist_ok=True)
+    temp_path = f"{PROFILING_MODE_FILE}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(mode)
+    os.replace(temp_path, PROFILING_MODE_FILE)
+    _refresh_mode(force=True)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected endpoints when profiling is switched on
+
+    With the mode "off" the per-request cost is a clock read, plus a stat of the
+    mode file once every PROFILING_MODE_REFRESH_SECONDS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._active = 0
+
+    def _should_profile(self, scope) -> bool:
+        if scope["path"] not in PROFILED_PATHS or self._active >= PROFILING_MAX_CONCURRENT:
+            return False
+        if _mode == "all":
+            return True
+        return any(
+            key == PROFILE_HEADER.encode() and value in (b"1", b"true", b"yes")
+            for key, value in scope.get("headers", [])
+        )
+
+    async def __call__(self, scope, receive, send):
+        if _refresh_mode() == "off" or scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        filename = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{scope['path'].strip('/').replace('/', '-')}_{profile_id}.folded"
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", filename.encode())]
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident())
+        self._active += 1
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._active -= 1
+            await asyncio.to_thread(sampler.stop)
+            await asyncio.to_thread(write_profile, filename, sampler)
+            print(f"🔬 Profiled {scope['path']} in {elapsed * 1000:.0f}ms ({sampler.samples} samples) -> {filename}")
+
+
+def write_profile(filename: str, sampler: StackSampler) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    filepath = os.path.join(PROFILE_DIR, filename)
+    with open(filepath, "w") as f:
+        f.write(sampler.folded())
+    return filepath
+
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Most recent stored profiles"""
+    if not os.path.exists(PROFILE_DIR):
+        return []
+    profiles = []
+    for filename in os.listdir(PROFILE_DIR):
+        if filename.endswith(".folded"):
+            stats = os.stat(os.path.join(PROFILE_DIR, filename))
+            profiles.append({
+                "filename": filename,
+                "size_kb": round(stats.st_size / 1024, 1),
+                "created": datetime.fromtimestamp(stats.st_mtime).isoformat()
+            })
+    return sorted(profiles, key=lambda p: p["created"], reverse=True)[:limit]
@@ -0,0 +1,84 @@
+"""
+Query caches for Laika Dynamics RAG System
+Small in-process LRU caches for query embeddings and search results, filled on demand and by the startup warm-up
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .metrics import count_cache
+
+
+class QueryCache:
+    """LRU cache with an optional TTL; every lookup is counted in rag_cache_requests_total"""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float = 0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, stored at)
+        self.hits = 0
+        self.misses = 0
+        self.warmed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable, usable: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """Cached value, or None; usable can reject an entry that does not cover this lookup"""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl_seconds and time.monotonic() - entry[1] > self.ttl_seconds:
+            del self._entries[key]
+            entry = None
+
+        hit = entry is not None and (usable is None or usable(entry[0]))
+        count_cache(self.name, hit)
+        if not hit:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Cached value without counting a lookup (warm-up bookkeeping)"""
+        entry = self._entries.get(key)
+        if entry is None or (self.ttl_seconds and time.monotonic() - entry[1] > self.ttl_seconds):
+            return None
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, warm: bool = False):
+        if not self.enabled:
+            return
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        if warm:
+            self.warmed += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop the entries whose key matches predicate; returns how many"""
+        stale = [key for key in self._entries if predicate(key)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds or None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "warmed": self.warmed
+        }
@@ -0,0 +1,482 @@
+"""
+Query routing for Laika Dynamics RAG System
+Answers aggregate and ranking questions with SQL over the full web_contracts table;
+open-ended questions keep going to retrieval + LLM
+"""
+
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select, func
+
+from .models import engine, WebContract
+
+QUERY_ROUTER_ENABLED = os.getenv("QUERY_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+ROUTER_DEFAULT_LIMIT = int(os.getenv("ROUTER_DEFAULT_LIMIT", "5"))
+ROUTER_MAX_LIMIT = 50
+FILTER_VALUES_CACHE_SECONDS = float(os.getenv("FILTER_VALUES_CACHE_SECONDS", "60"))
+
+_contracts = WebContract.__table__
+
+# measure -> (SQL expression, label)
+MEASURES = {
+    "contract_value": (_contracts.c.contract_value, "contract value"),
+    "hourly_rate": (_contracts.c.hourly_rate, "hourly rate"),
+    "estimated_hours": (_contracts.c.estimated_hours, "estimated hours"),
+    "duration_days": (
+        func.julianday(_contracts.c.estimated_completion) - func.julianday(_contracts.c.start_date),
+        "project timeline"
+    ),
+}
+
+# First match wins, so "per hour" is a rate before "hours" is effort
+MEASURE_PATTERNS = [
+    ("hourly_rate", r"\b(hourly|rates?|per hour)\b"),
+    ("duration_days", r"\b(timelines?|durations?|how long|take to (complete|finish|deliver))\b"),
+    ("estimated_hours", r"\b(hours|effort)\b"),
+    ("contract_value", r"\b(values?|valuable|budgets?|revenue|prices?|priciest|costs?|worth|expensive|spend|spent)\b"),
+]
+
+# Dimensions to group by -> web_contracts column ("technologies" is split per technology)
+DIMENSION_PATTERNS = [
+    ("payment_terms", r"\bpayment (terms?|methods?|schedules?)\b"),
+    ("technologies", r"\b(technolog(y|ies)|tech stacks?|stacks?|frameworks?)\b"),
+    ("contract_type", r"\b(contract|project) types?\b|\btypes? of (contracts?|projects?|work)\b"),
+    ("client_industry", r"\b(industr(y|ies)|sectors?|verticals?)\b"),
+    ("project_complexity", r"\bcomplexit(y|ies)\b"),
+    ("status", r"\bstatus(es)?\b"),
+    ("client_location", r"\b(locations?|cities|city|regions?)\b"),
+    ("client_company", r"\b(clients?|customers?)\b"),
+]
+
+# Columns whose values can appear in a question as a filter
+FILTER_COLUMNS = ["contract_type", "client_industry", "status", "project_complexity", "payment_terms"]
+
+# Extra phrasings of known column values, applied only when the value exists in the data
+VALUE_ALIASES = {
+    "contract_type": {
+        "web_app": [r"web applications?"],
+        "ecommerce": [r"e-commerce", r"online stores?"],
+        "api_development": [r"apis"],
+    },
+    "client_industry": {
+        "Technology": [r"tech (companies|clients|firms|industry|sector)"],
+        "Non-profit": [r"non-?profits?", r"nonprofits?"],
+        "Food & Beverage": [r"food (and|&) beverage"],
+    },
+    "status": {
+        "on_hold": [r"paused"],
+        "cancelled": [r"canceled"],
+        "active": [r"ongoing", r"in progress"],
+    },
+}
+
+# Boolean requirement columns
+FEATURE_PATTERNS = {
+    "api_integration": r"\bapi integrations?\b",
+    "ecommerce_features": r"\be-?commerce features?\b",
+    "cms_required": r"\bcms (required|features?)\b",
+    "seo_optimization": r"\bseo\b",
+}
+
+FREQUENCY = r"\b(most|least) (common(ly)?|frequent(ly)?|popular|used|often)\b|\bpopular\b"
+RANK_DESC = r"\b(highest|largest|biggest|top|most expensive|most valuable|priciest|longest|maximum|best[- ]paying)\b"
+RANK_ASC = r"\b(lowest|smallest|cheapest|least expensive|shortest|minimum)\b"
+RANK_IMPLIES_VALUE = r"\b(top|biggest|largest|most expensive|most valuable|priciest|cheapest|least expensive)\b"
+RANK_BY_COUNT = r"\b(most|fewest) (contracts|projects|deals|jobs)\b"
+AVERAGE = r"\b(average|avg|mean|typical(ly)?|median|usual(ly)?)\b"
+TOTAL = r"\b(total|sum|combined)\b"
+COUNT = r"\b(how many|number of|count)\b"
+GROUP_BY = r"\b(by|per|each|every|across)\b"
+
+LIMIT = r"\b(?:top|first|bottom)\s+(\d+)\b|\b(\d+)\s+(?:highest|largest|biggest|lowest|smallest|cheapest|most)\b"
+
+# Words that carry no constraint. Any other word a plan doesn't consume (a technology,
+# place, company, number, "why", "not", "last year"...) sends the question to retrieval
+# rather than to an aggregate that silently ignores it
+FILLER_WORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "with", "from", "to", "and", "or", "at", "as",
+    "is", "are", "was", "were", "be", "been", "do", "does", "did", "have", "has", "had", "there",
+    "what", "what's", "whats", "which", "who", "how", "much", "it", "its", "that", "this", "these", "those",
+    "we", "our", "us", "me", "my", "i", "you", "your", "their", "show", "list", "give", "tell", "find",
+    "get", "see", "all", "any", "please", "overall", "used", "take", "takes",
+    "contract", "contracts", "project", "projects", "deal", "deals", "job", "jobs", "work",
+}
+TERM = r"[$a-z0-9][a-z0-9%$]*(?:['.,][a-z0-9]+)*"
+
+_filter_values: Dict[str, List[str]] = {}
+_filter_values_loaded = 0.0
+
+
+def _search(pattern: str, text: str) -> bool:
+    return re.search(pattern, text) is not None
+
+
+def _value_pattern(value: str) -> str:
+    return re.escape(value.lower().replace("_", " ")) + "s?"
+
+
+def load_filter_values(force: bool = False) -> Dict[str, List[str]]:
+    """Distinct values of the filterable columns, cached for FILTER_VALUES_CACHE_SECONDS"""
+    global _filter_values, _filter_values_loaded
+    if not force and time.monotonic() - _filter_values_loaded < FILTER_VALUES_CACHE_SECONDS:
+        return _filter_values
+
+    values = {}
+    with engine.connect() as conn:
+        for column in FILTER_COLUMNS:
+            col = _contracts.c[column]
+            values[column] = [v for (v,) in conn.execute(select(col).where(col.isnot(None)).distinct()) if v]
+    _filter_values = values
+    # An empty table is not cached, so the first load is picked up straight away
+    _filter_values_loaded = time.monotonic() if any(values.values()) else 0.0
+    return values
+
+
+def extract_filters(question: str) -> Dict[str, List[Any]]:
+    """Column values and requirement flags mentioned in the question"""
+    filters: Dict[str, List[Any]] = {}
+    for column, values in load_filter_values().items():
+        aliases = VALUE_ALIASES.get(column, {})
+        for value in values:
+            patterns = [_value_pattern(value)] + aliases.get(value, [])
+            if any(_search(rf"\b({pattern})\b", question) for pattern in patterns):
+                filters.setdefault(column, []).append(value)
+    for column, pattern in FEATURE_PATTERNS.items():
+        if _search(pattern, question):
+            filters[column] = [True]
+    return filters
+
+
+def _find_dimension(text: str) -> Optional[str]:
+    for dimension, pattern in DIMENSION_PATTERNS:
+        if _search(pattern, text):
+            return dimension
+    return None
+
+
+def _find_measure(text: str) -> Optional[str]:
+    for measure, pattern in MEASURE_PATTERNS:
+        if _search(pattern, text):
+            return measure
+    return None
+
+
+def _find_limit(text: str) -> int:
+    match = re.search(LIMIT, text)
+    limit = int(match.group(1) or match.group(2)) if match else ROUTER_DEFAULT_LIMIT
+    return max(1, min(limit, ROUTER_MAX_LIMIT))
+
+
+def route_question(question: str) -> Optional[Dict[str, Any]]:
+    """Query plan for an aggregate or ranking question, or None for the retrieval path"""
+    text = " ".join(question.casefold().split())
+    intents = (FREQUENCY, RANK_DESC, RANK_ASC, RANK_BY_COUNT, AVERAGE, TOTAL, COUNT)
+    if not any(_search(pattern, text) for pattern in intents):
+        return None
+
+    # Measure phrases are not filters: "hourly rate" must not select the "Hourly" payment terms
+    filters = extract_filters(re.sub("|".join(pattern for _, pattern in MEASURE_PATTERNS), " ", text))
+    measure = _find_measure(text)
+    dimension = _find_dimension(text)
+    if dimension in filters:
+        dimension = None  # "...in the healthcare industry" filters, it doesn't group
+    by_clause = re.search(GROUP_BY + r"(.*)", text)
+    group_by = _find_dimension(by_clause.group(2)) if by_clause else None
+    if group_by in filters:
+        group_by = None
+
+    plan = {"filters": filters, "limit": _find_limit(text), "order": "desc"}
+    rank_asc = _search(RANK_ASC, text)
+    ranking = rank_asc or _search(RANK_DESC, text) or _search(RANK_BY_COUNT, text)
+    if rank_asc or _search(r"\b(least|fewest)\b", text):
+        plan["order"] = "asc"
+
+    if dimension and (_search(FREQUENCY, text) or (ranking and not measure and _search(r"\btop\b", text))):
+        plan.update(intent="frequency", group_by=dimension)
+    elif ranking and dimension and (measure or _search(RANK_BY_COUNT, text) or _search(RANK_IMPLIES_VALUE, text)):
+        if _search(RANK_BY_COUNT, text) and not measure:
+            plan.update(intent="rank_groups", group_by=dimension, measure=None, aggregate="count")
+        else:
+            measure = measure or "contract_value"
+            aggregate = "avg" if _search(AVERAGE, text) or measure in ("hourly_rate", "duration_days") else "sum"
+            plan.update(intent="rank_groups", group_by=dimension, measure=measure, aggregate=aggregate)
+    elif ranking and (measure or _search(RANK_IMPLIES_VALUE, text)):
+        plan.update(intent="rank_contracts", measure=measure or "contract_value")
+    elif measure and (_search(AVERAGE, text) or _search(TOTAL, text)):
+        aggregate = "sum" if _search(TOTAL, text) and not _search(AVERAGE, text) else "avg"
+        plan.update(intent="aggregate", measure=measure, aggregate=aggregate, group_by=group_by)
+    elif _search(COUNT, text):
+        plan.update(intent="count", group_by=group_by)
+    else:
+        return None
+
+    if unconsumed_terms(text, plan):
+        return None
+    return plan
+
+
+def _plan_patterns(plan: Dict[str, Any]) -> List[str]:
+    """Phrasings the plan accounts for: its intent, measure, grouping and filters"""
+    dimensions = dict(DIMENSION_PATTERNS)
+    patterns = [FREQUENCY, RANK_DESC, RANK_ASC, RANK_BY_COUNT, AVERAGE, TOTAL, COUNT, GROUP_BY, LIMIT,
+                r"\b(least|fewest)\b"]
+    if plan.get("measure"):
+        patterns.append(dict(MEASURE_PATTERNS)[plan["measure"]])
+    if plan.get("group_by"):
+        patterns.append(dimensions[plan["group_by"]])
+    for column, values in plan["filters"].items():
+        if column in FEATURE_PATTERNS:
+            patterns.append(FEATURE_PATTERNS[column])
+            continue
+        # "healthcare industry", "active status": the column name only describes the filter
+        if column in dimensions:
+            patterns.append(dimensions[column])
+        aliases = VALUE_ALIASES.get(column, {})
+        for value in values:
+            patterns += [rf"\b({pattern})\b" for pattern in [_value_pattern(value)] + aliases.get(value, [])]
+    return patterns
+
+
+def unconsumed_terms(text: str, plan: Dict[str, Any]) -> List[str]:
+    """Words of the question that no part of the plan consumed (filler words aside)"""
+    covered = [False] * len(text)
+    for pattern in _plan_patterns(plan):
+        for match in re.finditer(pattern, text):
+            covered[match.start():match.end()] = [True] * (match.end() - match.start())
+    return [
+        match.group() for match in re.finditer(TERM, text)
+        if match.group() not in FILLER_WORDS and not all(covered[match.start():match.end()])
+    ]
+
+
+def _where(query, filters: Dict[str, List[Any]]):
+    for column, values in filters.items():
+        col = _contracts.c[column]
+        query = query.where(col == values[0] if len(values) == 1 else col.in_(values))
+    return query
+
+
+def _split_technologies(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    if value.startswith("["):
+        try:
+            return [str(tech).strip() for tech in json.loads(value) if str(tech).strip()]
+        except ValueError:
+            pass
+    return [tech.strip() for tech in value.split(",") if tech.strip()]
+
+
+def format_measure(measure: Optional[str], value: Optional[float]) -> str:
+    if value is None:
+        return "n/a"
+    if measure == "contract_value":
+        return f"${value:,.2f}"
+    if measure == "hourly_rate":
+        return f"${value:,.2f}/hour"
+    if measure == "estimated_hours":
+        return f"{value:,.0f} hours"
+    if measure == "duration_days":
+        return f"{value:,.1f} days"
+    return f"{value:,.0f}"
+
+
+def _contract_count(count: int) -> str:
+    return f"{count:,} contract" + ("" if count == 1 else "s")
+
+
+def _describe_filters(filters: Dict[str, List[Any]]) -> str:
+    parts = []
+    for column, values in filters.items():
+        if values == [True]:
+            parts.append(f"{column.replace('_', ' ')} required")
+        else:
+            parts.append(f"{column.replace('_', ' ')} {' or '.join(str(v) for v in values)}")
+    return f" ({', '.join(parts)})" if parts else ""
+
+
+def _rank_contracts(conn, plan) -> Dict[str, Any]:
+    expr, label = MEASURES[plan["measure"]]
+    order = expr.asc() if plan["order"] == "asc" else expr.desc()
+    query = select(
+        _contracts.c.contract_id, _contracts.c.client_company, _contracts.c.project_title,
+        _contracts.c.contract_type, _contracts.c.client_industry, expr.label("measure")
+    ).where(expr.isnot(None)).order_by(order).limit(plan["limit"])
+    rows = [dict(row) for row in conn.execute(_where(query, plan["filters"])).mappings()]
+
+    direction = "Lowest" if plan["order"] == "asc" else "Highest"
+    lines = [f"{direction} {label} contracts{_describe_filters(plan['filters'])}:"]
+    for i, row in enumerate(rows, 1):
+        lines.append(f"{i}. {row['contract_id']} - {row['project_title']} for {row['client_company']}: "
+                     f"{format_measure(plan['measure'], row['measure'])}")
+    sources = [
+        {
+            "contract_id": row["contract_id"],
+            "client_company": row["client_company"],
+            "project_title": row["project_title"],
+            plan["measure"]: row["measure"]
+        }
+        for row in rows
+    ]
+    return {"answer": "\n".join(lines), "rows": rows, "sources": sources}
+
+
+def _group_rows(conn, plan) -> List[Dict[str, Any]]:
+    """key, contracts, measure per group, ordered and limited as planned"""
+    measure, aggregate, dimension = plan.get("measure"), plan.get("aggregate", "count"), plan["group_by"]
+    expr = MEASURES[measure][0] if measure else None
+
+    if dimension == "technologies":
+        # One contract lists several technologies - count it under each of them
+        columns = [_contracts.c.technologies] + ([expr.label("measure")] if expr is not None else [])
+        groups = defaultdict(list)
+        for row in conn.execute(_where(select(*columns), plan["filters"])):
+            for tech in _split_technologies(row[0]):
+                groups[tech].append(row[1] if expr is not None else None)
+        rows = []
+        for tech, values in groups.items():
+            present = [v for v in values if v is not None]
+            value = None
+            if aggregate == "count":
+                value = len(values)
+            elif present:
+                value = float(np.sum(present)) if aggregate == "sum" else float(np.mean(present))
+            rows.append({"key": tech, "contracts": len(values), "measure": value})
+    else:
+        col = _contracts.c[dimension]
+        aggregated = {"sum": func.sum, "avg": func.avg}[aggregate](expr) if aggregate != "count" else func.count()
+        query = select(col.label("key"), func.count().label("contracts"), aggregated.label("measure")) \
+            .where(col.isnot(None)).group_by(col)
+        rows = [dict(row) for row in conn.execute(_where(query, plan["filters"])).mappings()]
+
+    rows = [row for row in rows if row["measure"] is not None]
+    rows.sort(key=lambda row: (row["measure"], row["contracts"]), reverse=plan["order"] != "asc")
+    return rows
+
+
+def _frequency(conn, plan) -> Dict[str, Any]:
+    rows = _group_rows(conn, {**plan, "measure": None, "aggregate": "count"})
+    matched = conn.execute(_where(select(func.count()).select_from(_contracts), plan["filters"])).scalar() or 0
+    rows = rows[:plan["limit"]]
+    for row in rows:
+        row["percentage"] = round(row["contracts"] / matched * 100, 1) if matched else 0.0
+
+    label = plan["group_by"].replace("_", " ")
+    which = "Least" if plan["order"] == "asc" else "Most"
+    lines = [f"{which} common {label} across {_contract_count(matched)}{_describe_filters(plan['filters'])}:"]
+    for i, row in enumerate(rows, 1):
+        lines.append(f"{i}. {row['key']}: {_contract_count(row['contracts'])} ({row['percentage']}%)")
+    return {"answer": "\n".join(lines), "rows": rows, "sources": [], "matched_contracts": matched}
+
+
+def _rank_groups(conn, plan) -> Dict[str, Any]:
+    rows = _group_rows(conn, plan)[:plan["limit"]]
+    label = plan["group_by"].replace("_", " ")
+    if plan["aggregate"] == "count":
+        heading = f"{label.capitalize()} by number of contracts"
+    else:
+        heading = f"{label.capitalize()} by {'average' if plan['aggregate'] == 'avg' else 'total'} {MEASURES[plan['measure']][1]}"
+    lines = [f"{heading}{_describe_filters(plan['filters'])}:"]
+    for i, row in enumerate(rows, 1):
+        if plan["aggregate"] == "count":
+            lines.append(f"{i}. {row['key']}: {_contract_count(row['contracts'])}")
+        else:
+            lines.append(f"{i}. {row['key']}: {format_measure(plan['measure'], row['measure'])} "
+                         f"across {_contract_count(row['contracts'])}")
+    return {"answer": "\n".join(lines), "rows": rows, "sources": []}
+
+
+def _aggregate(conn, plan) -> Dict[str, Any]:
+    measure, aggregate = plan["measure"], plan["aggregate"]
+    expr, label = MEASURES[measure]
+    description = _describe_filters(plan["filters"])
+
+    if plan.get("group_by"):
+        rows = _group_rows(conn, plan)[:ROUTER_MAX_LIMIT]
+        word = "Average" if aggregate == "avg" else "Total"
+        lines = [f"{word} {label} by {plan['group_by'].replace('_', ' ')}{description}:"]
+        for row in rows:
+            lines.append(f"- {row['key']}: {format_measure(measure, row['measure'])} ({_contract_count(row['contracts'])})")
+        return {"answer": "\n".join(lines), "rows": rows, "sources": []}
+
+    # One indexed pass for the values; the median needs them all anyway
+    values = np.array(
+        [v for (v,) in conn.execute(_where(select(expr).where(expr.isnot(None)), plan["filters"])) if v is not None],
+        dtype=float
+    )
+    if not len(values):
+        return {"answer": f"No contracts match{description or ' this question'}.", "rows": [], "sources": [],
+                "matched_contracts": 0}
+
+    stats = {
+        "contracts": int(len(values)),
+        "average": float(values.mean()),
+        "median": float(np.median(values)),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "total": float(values.sum())
+    }
+    if aggregate == "sum":
+        answer = f"The total {label}{description} is {format_measure(measure, stats['total'])} across {_contract_count(stats['contracts'])}."
+    else:
+        answer = (f"The average {label}{description} is {format_measure(measure, stats['average'])} "
+                  f"(median {format_measure(measure, stats['median'])}, range {format_measure(measure, stats['min'])}"
+                  f" to {format_measure(measure, stats['max'])}) across {_contract_count(stats['contracts'])}.")
+    return {"answer": answer, "rows": [stats], "sources": [], "matched_contracts": stats["contracts"]}
+
+
+def _count(conn, plan) -> Dict[str, Any]:
+    description = _describe_filters(plan["filters"])
+    if plan.get("group_by"):
+        rows = _group_rows(conn, {**plan, "measure": None, "aggregate": "count"})[:ROUTER_MAX_LIMIT]
+        lines = [f"Contracts by {plan['group_by'].replace('_', ' ')}{description}:"]
+        lines += [f"- {row['key']}: {row['contracts']:,}" for row in rows]
+        return {"answer": "\n".join(lines), "rows": rows, "sources": []}
+
+    matched = conn.execute(_where(select(func.count()).select_from(_contracts), plan["filters"])).scalar() or 0
+    verb = "is" if matched == 1 else "are"
+    return {"answer": f"There {verb} {_contract_count(matched)}{description}.", "rows": [{"contracts": matched}],
+            "sources": [], "matched_contracts": matched}
+
+
+INTENT_HANDLERS = {
+    "rank_contracts": _rank_contracts,
+    "rank_groups": _rank_groups,
+    "frequency": _frequency,
+    "aggregate": _aggregate,
+    "count": _count,
+}
+
+
+def answer_analytical(question: str) -> Optional[Dict[str, Any]]:
+    """Answer an aggregate/ranking question from web_contracts, or None to use retrieval
+
+    Blocking (SQLite); call it through asyncio.to_thread.
+    """
+    started = time.perf_counter()
+    plan = route_question(question)
+    if plan is None:
+        return None
+
+    with engine.connect() as conn:
+        # Stops at the first row; with nothing stored locally only the vector store can answer
+        if conn.execute(select(_contracts.c.id).limit(1)).first() is None:
+            return None
+        result = INTENT_HANDLERS[plan["intent"]](conn, plan)
+
+    return {
+        "answer": result["answer"],
+        "sources": result["sources"],
+        "analytics": {
+            **plan,
+            "rows": result["rows"],
+            "matched_contracts": result.get("matched_contracts"),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    }
@@ -0,0 +1,83 @@
+"""
+Question log for Laika Dynamics RAG System
+Daily ask counts per normalized question, persisted in SQLite so the warm-up knows what users ask after a restart
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import select, func, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import engine, QuestionLog
+
+QUESTION_LOG_ENABLED = os.getenv("QUESTION_LOG_ENABLED", "true").lower() in ("1", "true", "yes")
+QUESTION_LOG_RETENTION_DAYS = int(os.getenv("QUESTION_LOG_RETENTION_DAYS", "90"))
+MAX_QUESTION_LENGTH = 500
+
+_log = QuestionLog.__table__
+
+
+def _day(days_ago: int = 0) -> str:
+    return (datetime.utcnow() - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+
+
+def record_question(normalized_question: str, question: str):
+    """Count one ask of a question for today"""
+    if not QUESTION_LOG_ENABLED or not normalized_question:
+        return
+    now = datetime.utcnow()
+    statement = sqlite_insert(_log).values(
+        normalized_question=normalized_question[:MAX_QUESTION_LENGTH],
+        question=question,
+        day=now.strftime("%Y-%m-%d"),
+        count=1,
+        last_asked_at=now
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["normalized_question", "day"],
+        set_={
+            "count": _log.c.count + 1,
+            "question": statement.excluded.question,
+            "last_asked_at": statement.excluded.last_asked_at
+        }
+    )
+    with engine.begin() as conn:
+        conn.execute(statement)
+
+
+def frequent_questions(limit: int = 20, days: int = 7) -> List[Dict[str, Any]]:
+    """Most asked questions over the last `days` days, most frequent first"""
+    asks = func.sum(_log.c.count).label("asks")
+    query = (
+        select(_log.c.normalized_question, asks, func.max(_log.c.last_asked_at).label("last_asked_at"))
+        .where(_log.c.day >= _day(days - 1))
+        .group_by(_log.c.normalized_question)
+        .order_by(asks.desc(), func.max(_log.c.last_asked_at).desc())
+        .limit(limit)
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+        if not rows:
+            return []
+        # Latest wording of each question
+        latest = dict(conn.execute(
+            select(_log.c.normalized_question, _log.c.question)
+            .where(_log.c.normalized_question.in_([row.normalized_question for row in rows]))
+            .order_by(_log.c.last_asked_at)
+        ).all())
+    return [
+        {
+            "question": latest.get(row.normalized_question, row.normalized_question),
+            "asks": int(row.asks),
+            "last_asked_at": row.last_asked_at.isoformat() if row.last_asked_at else None
+        }
+        for row in rows
+    ]
+
+
+def prune_question_log(retention_days: int = QUESTION_LOG_RETENTION_DAYS) -> int:
+    """Drop day counts older than the retention window; returns rows deleted"""
+    with engine.begin() as conn:
+        return conn.execute(delete(_log).where(_log.c.day < _day(retention_days))).rowcount
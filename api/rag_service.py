@@ -3,96 +3,787 @@ RAG Service with OpenAI Integration
 Handles embeddings, vector search, and AI-powered querying
 """
 
-from openai import AsyncOpenAI
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 import os
 from datetime import datetime
 import json
 import sqlite3
-from sentence_transformers import SentenceTransformer
 import asyncio
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-import uuid
+import threading
+import time
+
+from .index_checkpoints import (
+    dataset_fingerprint, point_id, get_checkpoint, save_checkpoint, find_unfinished, list_checkpoints, delete_checkpoints,
+    claim_build, touch_build, active_builds
+)
+from .contract_store import RECORD_COLUMNS, fetch_contracts, payload_value
+from .query_router import QUERY_ROUTER_ENABLED, answer_analytical
+from .query_cache import QueryCache
+from .question_log import QUESTION_LOG_ENABLED, record_question, frequent_questions, prune_question_log
+from .embedding_registry import (
+    EMBEDDING_MODELS, provider_for_dimension, get_collection_embedding, register_collection_embedding,
+    delete_collection_embedding
+)
+from .metrics import track_stage, stage_timer, observe_batch, count_tokens, count_error, count_cache
+
+LOCAL_MODEL_NAME = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# "auto" embeds with OpenAI when a key is configured, "local" always uses the local model
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "auto").lower()
+
+# Qdrant connection settings
+QDRANT_LOCATION = os.getenv("QDRANT_LOCATION")  # e.g. ":memory:" for an in-process instance
+QDRANT_URL = os.getenv("QDRANT_URL")
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() in ("1", "true", "yes")
+QDRANT_GRPC_UPSERTS = os.getenv("QDRANT_GRPC_UPSERTS", "false").lower() in ("1", "true", "yes")
+QDRANT_TIMEOUT = float(os.getenv("QDRANT_TIMEOUT", "10"))
+QDRANT_RETRIES = int(os.getenv("QDRANT_RETRIES", "2"))
+QDRANT_RETRY_BACKOFF = float(os.getenv("QDRANT_RETRY_BACKOFF", "0.25"))
+# Searches sit on the request path: a tighter deadline and fewer retries than writes
+QDRANT_SEARCH_TIMEOUT = float(os.getenv("QDRANT_SEARCH_TIMEOUT", "2"))
+QDRANT_SEARCH_RETRIES = int(os.getenv("QDRANT_SEARCH_RETRIES", "1"))
+# After this many consecutive transient failures, calls fail fast for QDRANT_BREAKER_SECONDS
+QDRANT_BREAKER_FAILURES = int(os.getenv("QDRANT_BREAKER_FAILURES", "5"))
+QDRANT_BREAKER_SECONDS = float(os.getenv("QDRANT_BREAKER_SECONDS", "30"))
+QDRANT_MAX_CONNECTIONS = int(os.getenv("QDRANT_MAX_CONNECTIONS", "20"))
+QDRANT_KEEPALIVE_SECONDS = float(os.getenv("QDRANT_KEEPALIVE_SECONDS", "30"))
+
+# Rows per embedding/upsert batch, and how many batches between checkpoint writes
+INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", "100"))
+INDEX_CHECKPOINT_INTERVAL = int(os.getenv("INDEX_CHECKPOINT_INTERVAL", "10"))
+
+# How long a worker trusts its cached view of which collection the alias serves
+SERVING_CACHE_SECONDS = float(os.getenv("SERVING_CACHE_SECONDS", "10"))
+
+# A running re-index touches its checkpoint every REINDEX_HEARTBEAT_SECONDS; other workers
+# treat it as the build target (and as holding the re-index lock) until it goes
+# REINDEX_STALE_SECONDS without one
+REINDEX_HEARTBEAT_SECONDS = float(os.getenv("REINDEX_HEARTBEAT_SECONDS", "15"))
+REINDEX_STALE_SECONDS = float(os.getenv("REINDEX_STALE_SECONDS", "120"))
+
+# Default pace of a background re-embedding migration
+EMBEDDING_MIGRATION_ROWS_PER_SEC = float(os.getenv("EMBEDDING_MIGRATION_ROWS_PER_SEC", "50"))
+
+# "full" stores every contract field in the point payload; "slim" stores the ID, the
+# filterable fields and any field web_contracts has no column for, and search hits are
+# hydrated from the web_contracts table. The marker lists record columns the source row
+# did not have, so hydration leaves them out just like a full payload would.
+QDRANT_PAYLOAD_MODE = os.getenv("QDRANT_PAYLOAD_MODE", "full").lower()
+SLIM_PAYLOAD_FIELDS = [
+    "contract_id", "contract_type", "client_industry", "status",
+    "project_complexity", "client_location", "contract_value", "start_date"
+]
+SLIM_PAYLOAD_MARKER = "_slim"
+
+# Query embeddings never go stale; search results are bounded by a TTL because other
+# workers may index into the same collection
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+SEARCH_CACHE_SECONDS = float(os.getenv("SEARCH_CACHE_SECONDS", "120"))
+
+# Concurrent identical rag_query calls share one computation (single flight)
+RAG_QUERY_COALESCING = os.getenv("RAG_QUERY_COALESCING", "true").lower() in ("1", "true", "yes")
+
+# Startup cache warm-up: example queries plus the most asked recent questions
+WARM_QUERY_CACHE = os.getenv("WARM_QUERY_CACHE", "true").lower() in ("1", "true", "yes")
+WARM_FREQUENT_QUESTIONS = int(os.getenv("WARM_FREQUENT_QUESTIONS", "20"))
+WARM_FREQUENT_DAYS = int(os.getenv("WARM_FREQUENT_DAYS", "7"))
+WARM_SEARCH_LIMIT = int(os.getenv("WARM_SEARCH_LIMIT", "10"))  # covers rag_query (5) and /rag/search (10)
+
+# Collection versions kept after a re-index (the live one plus rollback targets)
+COLLECTION_VERSIONS_KEPT = int(os.getenv("COLLECTION_VERSIONS_KEPT", "2"))
+
+# "torch" runs sentence-transformers, "onnx" an exported (int8 by default) model on ONNX Runtime
+LOCAL_EMBEDDING_BACKEND = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch").lower()
+
+# Loaded models are shared by every RAGService in the process
+_local_models: Dict[tuple, Any] = {}
+_local_models_lock = threading.Lock()
+
+
+# gRPC status codes worth retrying; the rest (NOT_FOUND, ALREADY_EXISTS, INVALID_ARGUMENT...) are client errors
+RETRYABLE_GRPC_CODES = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED", "INTERNAL", "UNKNOWN", "ABORTED"}
+
+
+def is_transient_qdrant_error(error: Exception) -> bool:
+    """Timeouts, transport errors and 5xx responses; a retry can't fix a 4xx"""
+    from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+    
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError, ResponseHandlingException)):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code is None or error.status_code >= 500
+    try:
+        import grpc
+        if isinstance(error, grpc.aio.AioRpcError):
+            return error.code().name in RETRYABLE_GRPC_CODES
+    except ImportError:
+        pass
+    try:
+        import httpx
+        return isinstance(error, httpx.TransportError)
+    except ImportError:
+        return False
+
+
+def load_local_model(model_name: str = LOCAL_MODEL_NAME, backend: str = LOCAL_EMBEDDING_BACKEND):
+    """Load (once per process) and return a local embedding model with an encode() method"""
+    with _local_models_lock:
+        if (model_name, backend) not in _local_models:
+            model = None
+            if backend == "onnx":
+                try:
+                    from .onnx_embedder import OnnxEmbedder
+                    model = OnnxEmbedder(model_name)
+                except Exception as e:
+                    print(f"⚠️ ONNX embedding backend unavailable ({e}), using sentence-transformers")
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(model_name)
+                print(f"✅ Local embedding model loaded: {model_name}")
+            _local_models[(model_name, backend)] = model
+        return _local_models[(model_name, backend)]
+
 
 class RAGService:
-    """Advanced RAG service with OpenAI and vector database integration"""
+    """Advanced RAG service with OpenAI and vector database integration
+    
+    Construction is cheap: the local embedding model and the Qdrant client are
+    created on first use, or ahead of time by warm_up().
+    """
     
     def __init__(self, openai_api_key: str = None):
-        # OpenAI setup
-        self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
-        if self.openai_api_key:
-            self.openai_client = AsyncOpenAI(api_key=self.openai_api_key)
+        self.openai_api_key = None
+        self.openai_client = None
+        self.use_openai = False
+        self.configure_openai(openai_api_key or os.getenv("OPENAI_API_KEY"))
+        
+        # Alias served to queries; re-indexing builds web_contracts_v<timestamp> and swaps it
+        self.collection_name = "web_contracts"
+        self.reindex_status: Dict[str, Any] = {"status": "idle"}
+        self._reindex_task = None
+        self._serving: Optional[tuple] = None  # (collection, fetched at)
+        self._collection_providers: Dict[str, str] = {}
+        self._local_model = None
+        self._local_model_failed = False
+        self._qdrant_client = None
+        self._qdrant_bulk_client = None
+        self._qdrant_failed = False
+        self._storage_lock: Optional[asyncio.Lock] = None
+        self._vector_storage_ready = False
+        self._warm_up_task = None
+        self._inflight_queries: Dict[tuple, asyncio.Future] = {}
+        self.coalesced_queries = 0
+        self.route_counts = {"analytics": 0, "retrieval": 0}
+        self._embedding_cache = QueryCache("query_embedding", QUERY_EMBEDDING_CACHE_SIZE)
+        self._search_cache = QueryCache("search_results", SEARCH_CACHE_SIZE, SEARCH_CACHE_SECONDS)
+        self.cache_warm_up: Dict[str, Any] = {"status": "idle"}
+        self._background_tasks = set()
+        self.vector_db_healthy = True
+        self._qdrant_failures = 0  # consecutive transient failures
+        self._breaker_open_until = 0.0
+        self._model_lock = threading.Lock()
+        self._qdrant_lock = threading.Lock()
+        
+        # Warm-up state reported by /health
+        self.warming_up = False
+        self.ready = False
+        
+        # SQLite database for structured data
+        self.db_path = "laika_rag.db"
+
+    def configure_openai(self, api_key: Optional[str]):
+        """Set or rotate the OpenAI key without touching loaded models or clients"""
+        if api_key and api_key == self.openai_api_key:
+            return
+        
+        self.openai_api_key = api_key
+        if api_key:
+            from openai import AsyncOpenAI
+            self.openai_client = AsyncOpenAI(api_key=api_key)
             self.use_openai = True
             print("✅ OpenAI API configured")
         else:
             self.openai_client = None
             self.use_openai = False
             print("⚠️ OpenAI API key not found, using local embeddings")
+
+    @property
+    def use_openai_embeddings(self) -> bool:
+        return self.use_openai and EMBEDDING_PROVIDER != "local"
+
+    @property
+    def embedding_provider(self) -> str:
+        """Provider new collections are built with under the current configuration"""
+        return "openai" if self.use_openai_embeddings else "local"
+
+    @property
+    def local_model(self):
+        """Local embedding model, loaded on first access"""
+        if self._local_model is None and not self._local_model_failed:
+            with self._model_lock:
+                if self._local_model is None and not self._local_model_failed:
+                    try:
+                        self._local_model = load_local_model()
+                    except Exception as e:
+                        print(f"❌ Error loading local model: {e}")
+                        self._local_model_failed = True
+        return self._local_model
+
+    def _create_qdrant_client(self, prefer_grpc: bool):
+        from qdrant_client import AsyncQdrantClient
+        
+        if QDRANT_LOCATION:
+            return AsyncQdrantClient(location=QDRANT_LOCATION)
+        
+        import httpx
+        return AsyncQdrantClient(
+            url=QDRANT_URL,
+            host=None if QDRANT_URL else QDRANT_HOST,
+            port=QDRANT_PORT,
+            grpc_port=QDRANT_GRPC_PORT,
+            prefer_grpc=prefer_grpc,
+            api_key=QDRANT_API_KEY,
+            timeout=QDRANT_TIMEOUT,
+            # qdrant-client disables keep-alive for localhost by default; pool connections instead
+            limits=httpx.Limits(
+                max_connections=QDRANT_MAX_CONNECTIONS,
+                max_keepalive_connections=QDRANT_MAX_CONNECTIONS,
+                keepalive_expiry=QDRANT_KEEPALIVE_SECONDS
+            )
+        )
+
+    @property
+    def qdrant_client(self):
+        """Async Qdrant client, created on first access (no network I/O until used)"""
+        if self._qdrant_client is None and not self._qdrant_failed:
+            with self._qdrant_lock:
+                if self._qdrant_client is None and not self._qdrant_failed:
+                    try:
+                        self._qdrant_client = self._create_qdrant_client(QDRANT_PREFER_GRPC)
+                        print("✅ Qdrant client initialized")
+                    except Exception as e:
+                        print(f"⚠️ Qdrant not available: {e}")
+                        self._qdrant_client = None
+                        self._qdrant_failed = True
+        return self._qdrant_client
+
+    @property
+    def qdrant_bulk_client(self):
+        """Client used for bulk upserts - a separate gRPC channel when QDRANT_GRPC_UPSERTS is set"""
+        if not QDRANT_GRPC_UPSERTS or QDRANT_PREFER_GRPC or QDRANT_LOCATION:
+            return self.qdrant_client
+        if self._qdrant_bulk_client is None and self.qdrant_client:
+            self._qdrant_bulk_client = self._create_qdrant_client(prefer_grpc=True)
+        return self._qdrant_bulk_client
+
+    async def _qdrant_call(self, method: str, *args, bulk: bool = False, timeout: float = None,
+                           retries: int = None, **kwargs):
+        """Call an AsyncQdrantClient method with a deadline and retries with backoff
+        
+        Only transient errors (timeouts, transport errors, 5xx) are retried and mark
+        Qdrant unhealthy; client errors such as a missing collection raise at once.
+        After QDRANT_BREAKER_FAILURES transient failures in a row the breaker opens
+        and calls fail fast until QDRANT_BREAKER_SECONDS have passed.
+        """
+        timeout = timeout or QDRANT_TIMEOUT
+        retries = QDRANT_RETRIES if retries is None else retries
+        if time.monotonic() < self._breaker_open_until:
+            raise ConnectionError(f"Qdrant unavailable, not retrying for {self._breaker_open_until - time.monotonic():.0f}s")
+        
+        client = self.qdrant_bulk_client if bulk else self.qdrant_client
+        for attempt in range(retries + 1):
+            try:
+                result = await asyncio.wait_for(getattr(client, method)(*args, **kwargs), timeout=timeout)
+            except Exception as e:
+                if not is_transient_qdrant_error(e):
+                    raise
+                if attempt < retries:
+                    await asyncio.sleep(QDRANT_RETRY_BACKOFF * (2 ** attempt))
+                    continue
+                self.vector_db_healthy = False
+                self._qdrant_failures += 1
+                if self._qdrant_failures >= QDRANT_BREAKER_FAILURES:
+                    self._breaker_open_until = time.monotonic() + QDRANT_BREAKER_SECONDS
+                    print(f"⚠️ Qdrant failing, fast-failing calls for {QDRANT_BREAKER_SECONDS:.0f}s")
+                if isinstance(e, asyncio.TimeoutError):
+                    raise TimeoutError(f"Qdrant {method} timed out after {timeout}s")
+                raise
+            self.vector_db_healthy = True
+            self._qdrant_failures = 0
+            return result
+
+    @property
+    def local_model_loaded(self) -> bool:
+        return self._local_model is not None
+
+    @property
+    def qdrant_breaker_open(self) -> bool:
+        return time.monotonic() < self._breaker_open_until
+
+    @property
+    def vector_db_connected(self) -> bool:
+        return self._qdrant_client is not None and self._vector_storage_ready and self.vector_db_healthy
+
+    async def warm_up(self, warm_queries: Optional[List[str]] = None):
+        """Load the local model and connect to Qdrant ahead of the first request
         
-        # Local embeddings fallback
+        Once the service is ready, query caches are filled for warm_queries and
+        the most asked recent questions.
+        """
+        self.warming_up = True
         try:
-            self.local_model = SentenceTransformer('all-MiniLM-L6-v2')
-            print("✅ Local embedding model loaded")
-        except Exception as e:
-            print(f"❌ Error loading local model: {e}")
-            self.local_model = None
+            await asyncio.to_thread(lambda: self.local_model)
+            await self.init_vector_storage()
+        finally:
+            self.warming_up = False
+            self.ready = True
+            print("✅ RAG service warm-up complete")
         
-        # Vector database setup
+        if WARM_QUERY_CACHE:
+            await self.warm_query_caches(warm_queries or [])
+
+    def start_warm_up(self, warm_queries: Optional[List[str]] = None):
+        """Schedule warm_up() on the running event loop so worker boot is not delayed"""
+        self.warming_up = True
+        self._warm_up_task = asyncio.create_task(self.warm_up(warm_queries))
+
+    async def warm_query_caches(self, questions: List[str]) -> Dict[str, Any]:
+        """Precompute query embeddings and search results for questions and frequent recent ones"""
+        started = time.perf_counter()
+        self.cache_warm_up = {"status": "running"}
         try:
-            self.qdrant_client = QdrantClient(host="localhost", port=6333)
-            self.collection_name = "web_contracts"
-            print("✅ Qdrant client initialized")
+            frequent = await asyncio.to_thread(frequent_questions, WARM_FREQUENT_QUESTIONS, WARM_FREQUENT_DAYS)
+            await asyncio.to_thread(prune_question_log)
+            
+            queries: Dict[str, str] = {}
+            for question in [*questions, *(entry["question"] for entry in frequent)]:
+                queries.setdefault(self.normalize_question(question), question)
+            self.cache_warm_up.update(
+                example_queries=len(questions), frequent_questions=len(frequent), queries=len(queries)
+            )
+            if not queries or not await self.init_vector_storage():
+                self.cache_warm_up["status"] = "skipped"
+                return self.cache_warm_up
+            
+            # One embedding batch for every question, then one search each
+            collection = await self.serving_collection()
+            provider = await self.collection_provider(collection)
+            missing = [(key, q) for key, q in queries.items() if self._embedding_cache.peek((provider, key)) is None]
+            if missing:
+                vectors = await self.get_embeddings([q for _, q in missing], provider=provider)
+                for (key, _), vector in zip(missing, vectors):
+                    self._embedding_cache.put((provider, key), vector, warm=True)
+            
+            searched = 0
+            for key, question in queries.items():
+                vector = self._embedding_cache.peek((provider, key))
+                results = await self._search(collection, question, WARM_SEARCH_LIMIT, query_embedding=vector)
+                if results:
+                    self._search_cache.put(
+                        self._search_key(collection, question), (WARM_SEARCH_LIMIT, results), warm=True
+                    )
+                    searched += 1
+            
+            self.cache_warm_up.update(status="completed", embedded=len(missing), searched=searched)
+            print(f"🔥 Warmed query caches for {len(queries)} questions in {time.perf_counter() - started:.1f}s")
         except Exception as e:
-            print(f"⚠️ Qdrant not available: {e}")
-            self.qdrant_client = None
-        
-        # SQLite database for structured data
-        self.db_path = "laika_rag.db"
-        self.init_vector_storage()
+            count_error("warm_query_caches")
+            self.cache_warm_up.update(status="failed", error=str(e))
+            print(f"⚠️ Query cache warm-up failed: {e}")
+        finally:
+            self.cache_warm_up["seconds"] = round(time.perf_counter() - started, 2)
+        return self.cache_warm_up
+
+    def query_cache_stats(self) -> Dict[str, Any]:
+        return {
+            "query_embedding": self._embedding_cache.stats(),
+            "search_results": self._search_cache.stats(),
+            "warm_up": self.cache_warm_up
+        }
+
+    async def close(self):
+        """Close pooled Qdrant connections"""
+        for client in {id(c): c for c in (self._qdrant_client, self._qdrant_bulk_client) if c}.values():
+            try:
+                await client.close()
+            except Exception as e:
+                print(f"⚠️ Error closing Qdrant client: {e}")
 
-    def init_vector_storage(self):
-        """Initialize vector storage collection in Qdrant"""
+    async def init_vector_storage(self) -> bool:
+        """Initialize vector storage collection in Qdrant (once; retried on failure)"""
+        if self._vector_storage_ready:
+            return True
         if not self.qdrant_client:
-            return
+            return False
         
-        try:
-            # Check if collection exists
-            collections = self.qdrant_client.get_collections()
-            collection_exists = any(col.name == self.collection_name for col in collections.collections)
-            
-            if not collection_exists:
-                # Create collection with appropriate vector size
-                vector_size = 1536 if self.use_openai else 384  # OpenAI vs local model
+        if self._storage_lock is None:
+            self._storage_lock = asyncio.Lock()
+        
+        async with self._storage_lock:
+            if self._vector_storage_ready:
+                return True
+            try:
+                # Check if collection exists
+                collections = await self._qdrant_call("get_collections")
+                collection_exists = any(col.name == self.collection_name for col in collections.collections)
                 
-                self.qdrant_client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
-                )
-                print(f"✅ Created Qdrant collection: {self.collection_name}")
-            else:
-                print(f"✅ Qdrant collection exists: {self.collection_name}")
+                if collection_exists:
+                    # Pre-versioning deployments: served directly until the first re-index swaps in an alias
+                    print(f"✅ Qdrant collection exists: {self.collection_name}")
+                elif await self.get_alias_target():
+                    print(f"✅ Qdrant alias {self.collection_name} -> {await self.get_alias_target()}")
+                else:
+                    version = self.new_collection_version()
+                    await self.create_collection(version)
+                    await self.swap_alias(version)
+                    print(f"✅ Created Qdrant collection: {version} (alias {self.collection_name})")
                 
-        except Exception as e:
-            print(f"❌ Error initializing vector storage: {e}")
+                self._vector_storage_ready = True
+            except Exception as e:
+                print(f"❌ Error initializing vector storage: {e}")
+        
+        return self._vector_storage_ready
 
-    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings using OpenAI or local model"""
-        if self.use_openai and self.openai_client:
-            try:
-                response = await self.openai_client.embeddings.create(
-                    model="text-embedding-ada-002",
-                    input=texts
+    # ==================== COLLECTION VERSIONS ====================
+
+    def new_collection_version(self) -> str:
+        return f"{self.collection_name}_v{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+
+    async def create_collection(self, name: str, provider: Optional[str] = None):
+        """Create a collection sized for provider's model and tag it with that model"""
+        from qdrant_client.models import Distance, VectorParams
+        
+        provider = provider or self.embedding_provider
+        _, vector_size = EMBEDDING_MODELS[provider]
+        await self._qdrant_call(
+            "create_collection",
+            collection_name=name,
+            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+        )
+        await asyncio.to_thread(register_collection_embedding, name, provider)
+        self._collection_providers[name] = provider
+
+    async def serving_collection(self) -> str:
+        """Concrete collection behind the alias, cached for SERVING_CACHE_SECONDS"""
+        now = time.monotonic()
+        if self._serving and now - self._serving[1] < SERVING_CACHE_SECONDS:
+            return self._serving[0]
+        collection = await self.get_alias_target() or self.collection_name
+        self._serving = (collection, now)
+        return collection
+
+    async def collection_provider(self, collection: str) -> str:
+        """Embedding provider a collection was built with (inferred from its size if untagged)"""
+        if collection not in self._collection_providers:
+            tag = await asyncio.to_thread(get_collection_embedding, collection)
+            if tag:
+                provider = tag["provider"]
+            else:
+                info = await self._qdrant_call("get_collection", collection)
+                provider = provider_for_dimension(info.config.params.vectors.size)
+                if provider is None:
+                    raise ValueError(f"Collection {collection} has no known embedding model")
+                await asyncio.to_thread(register_collection_embedding, collection, provider)
+            self._collection_providers[collection] = provider
+        return self._collection_providers[collection]
+
+    async def embedding_status(self) -> Dict[str, Any]:
+        """Configured embedding model versus the one the served collection was built with"""
+        serving = await self.serving_collection()
+        provider = await self.collection_provider(serving)
+        model, dimension = EMBEDDING_MODELS[provider]
+        return {
+            "configured_provider": self.embedding_provider,
+            "serving_provider": provider,
+            "serving_model": model,
+            "serving_dimension": dimension,
+            "migration_needed": provider != self.embedding_provider
+        }
+
+    async def get_alias_target(self) -> Optional[str]:
+        """Collection the query alias currently points at (None if there is no alias)"""
+        aliases = await self._qdrant_call("get_aliases")
+        for alias in aliases.aliases:
+            if alias.alias_name == self.collection_name:
+                return alias.collection_name
+        return None
+
+    async def list_collection_versions(self) -> List[str]:
+        """Versioned collections, oldest first"""
+        collections = await self._qdrant_call("get_collections")
+        prefix = f"{self.collection_name}_v"
+        return sorted(col.name for col in collections.collections if col.name.startswith(prefix))
+
+    async def swap_alias(self, collection: str) -> Optional[str]:
+        """Atomically point the query alias at collection; returns the collection it replaced"""
+        from qdrant_client.models import CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+        
+        previous = await self.get_alias_target()
+        operations = []
+        if previous:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=self.collection_name)))
+        else:
+            collections = await self._qdrant_call("get_collections")
+            if any(col.name == self.collection_name for col in collections.collections):
+                # A concrete collection can't share its name with an alias. Keep its vectors as the
+                # oldest version (the rollback target), then free the name; searches that land between
+                # the delete and the alias operation look the alias up again and retry once.
+                previous = await self.adopt_legacy_collection()
+                self._serving = (previous, time.monotonic())
+                await self._qdrant_call("delete_collection", self.collection_name)
+        operations.append(CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=collection, alias_name=self.collection_name)
+        ))
+        
+        await self._qdrant_call("update_collection_aliases", change_aliases_operations=operations)
+        self._serving = (collection, time.monotonic())
+        print(f"🔀 Alias {self.collection_name} -> {collection}")
+        return previous
+
+    async def adopt_legacy_collection(self) -> str:
+        """Copy the unversioned collection into the oldest version name; returns that name
+        
+        Qdrant can't rename collections, so points are copied with their vectors and the
+        copy is verified by count before the original may be dropped.
+        """
+        from qdrant_client.models import PointStruct
+        
+        legacy_version = f"{self.collection_name}_v{'0' * 20}"  # sorts before every timestamped version
+        provider = await self.collection_provider(self.collection_name)
+        existing = await self._qdrant_call("get_collections")
+        if any(col.name == legacy_version for col in existing.collections):
+            await self._qdrant_call("delete_collection", legacy_version)  # leftover of an interrupted copy
+        await self.create_collection(legacy_version, provider)
+        
+        print(f"🔄 Copying unversioned collection {self.collection_name} to {legacy_version}...")
+        offset = None
+        while True:
+            points, offset = await self._qdrant_call(
+                "scroll",
+                collection_name=self.collection_name,
+                limit=INDEX_BATCH_SIZE,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            if points:
+                await self._qdrant_call(
+                    "upsert",
+                    collection_name=legacy_version,
+                    points=[PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points],
+                    bulk=True
                 )
-                return [item.embedding for item in response.data]
+            if offset is None:
+                break
+        
+        source = await self._qdrant_call("count", self.collection_name, exact=True)
+        copied = await self._qdrant_call("count", legacy_version, exact=True)
+        if copied.count != source.count:
+            raise Exception(f"Copy of {self.collection_name} has {copied.count} of {source.count} points")
+        
+        await asyncio.to_thread(delete_checkpoints, self.collection_name)
+        await asyncio.to_thread(delete_collection_embedding, self.collection_name)
+        self._collection_providers.pop(self.collection_name, None)
+        print(f"✅ Kept {copied.count} legacy points as {legacy_version}")
+        return legacy_version
+
+    async def rollback_alias(self) -> Dict[str, Any]:
+        """Point the alias back at the version before the one currently served"""
+        current = await self.get_alias_target()
+        unfinished = await self._unfinished_versions()
+        older = [v for v in await self.list_collection_versions() if current and v < current and v not in unfinished]
+        if not older:
+            return {"error": "No previous collection version to roll back to"}
+        await self.swap_alias(older[-1])
+        return {"status": "success", "collection": older[-1], "replaced": current}
+
+    async def prune_collection_versions(self) -> List[str]:
+        """Keep the live version plus the COLLECTION_VERSIONS_KEPT - 1 rollback targets before it
+        
+        Only versions older than the live one are dropped: newer ones may be builds
+        still running in another worker. A version whose re-index checkpoint is still
+        running is never dropped; other unfinished older versions are abandoned builds.
+        """
+        current = await self.get_alias_target()
+        if not current:
+            return []
+        checkpoints = await asyncio.to_thread(list_checkpoints, 1000)
+        running = {
+            c["collection_name"] for c in checkpoints
+            if c["fingerprint"].startswith("reindex:") and c["status"] == "running"
+        }
+        unfinished = await self._unfinished_versions()
+        older = [v for v in await self.list_collection_versions() if v < current]
+        rollback_targets = [v for v in older if v not in unfinished]
+        keep = set(rollback_targets[-(COLLECTION_VERSIONS_KEPT - 1):] if COLLECTION_VERSIONS_KEPT > 1 else [])
+        deleted = []
+        for version in older:
+            if version not in keep and version not in running:
+                await self._qdrant_call("delete_collection", version)
+                await asyncio.to_thread(delete_checkpoints, version)
+                await asyncio.to_thread(delete_collection_embedding, version)
+                self._collection_providers.pop(version, None)
+                deleted.append(version)
+        return deleted
+
+    async def _unfinished_versions(self) -> set:
+        """Versions whose re-index build failed or was interrupted (never served)"""
+        checkpoints = await asyncio.to_thread(list_checkpoints, 1000)
+        return {
+            c["collection_name"] for c in checkpoints
+            if c["fingerprint"].startswith("reindex:") and c["status"] != "completed"
+        }
+
+    async def _reindex_targets(self) -> List[str]:
+        """Collections a re-index is building right now, in this or any other worker"""
+        return await asyncio.to_thread(active_builds, REINDEX_STALE_SECONDS)
+
+    async def _claim_reindex(self, source: str, provider: str) -> Optional[tuple]:
+        """(build key, version, resumed) with the re-index lock held in SQLite, or None if a build is running"""
+        build_key = f"reindex:{source}:{provider}"
+        unfinished = await asyncio.to_thread(find_unfinished, build_key)
+        resumed = bool(unfinished and unfinished["collection_name"] in await self.list_collection_versions())
+        version = unfinished["collection_name"] if resumed else self.new_collection_version()
+        if not await asyncio.to_thread(claim_build, build_key, version, REINDEX_STALE_SECONDS):
+            return None
+        return build_key, version, resumed
+
+    async def _build_heartbeat(self, build_key: str, version: str):
+        while True:
+            await asyncio.sleep(REINDEX_HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(touch_build, build_key, version)
             except Exception as e:
-                print(f"OpenAI embedding error: {e}, falling back to local model")
+                print(f"⚠️ Re-index heartbeat failed: {e}")
+
+    async def reindex(self, batches: Iterable[pd.DataFrame], source: str = "web_contracts",
+                      provider: Optional[str] = None, max_rows_per_sec: Optional[float] = None,
+                      claim: Optional[tuple] = None) -> Dict[str, Any]:
+        """Build a new collection version from batches, then swap the alias to it
+        
+        Queries keep reading the current version until the swap, which is atomic.
+        Batches are pulled from the iterable in a worker thread. A build that
+        failed or was interrupted is resumed on the next re-index of the same
+        source: batches already checkpointed into it are skipped.
+        
+        The new version is built with provider's embedding model (default: the
+        configured one), which is how collections migrate between models.
+        
+        The running build checkpoint in SQLite is the re-index lock for all workers
+        and tells their live writes where the build is; claim is that lock when
+        start_reindex already took it.
+        """
+        if not await self.init_vector_storage():
+            return {"error": "Vector database not available"}
+        
+        provider = provider or self.embedding_provider
+        claim = claim or await self._claim_reindex(source, provider)
+        if claim is None:
+            return {"error": "A re-index is already running"}
+        build_key, version, resumed = claim
+        
+        self.reindex_status = {
+            "status": "indexing",
+            "source": source,
+            "collection": version,
+            "provider": provider,
+            "max_rows_per_sec": max_rows_per_sec,
+            "resumed": resumed,
+            "indexed_count": 0,
+            "started_at": datetime.now().isoformat()
+        }
+        started = datetime.now()
+        heartbeat = asyncio.create_task(self._build_heartbeat(build_key, version))
+        try:
+            if resumed:
+                print(f"⏩ Resuming re-index of {source} into {version}")
+            else:
+                await self.create_collection(version, provider)
+            
+            iterator = iter(batches)
+            while True:
+                batch = await asyncio.to_thread(next, iterator, None)
+                if batch is None:
+                    break
+                outcome = await self.index_contracts(batch, collection_name=version, max_rows_per_sec=max_rows_per_sec)
+                if "error" in outcome:
+                    raise RuntimeError(outcome["error"])
+                self.reindex_status["indexed_count"] += outcome["indexed_count"]
+            
+            # Live writes from any worker that failed to reach the build
+            missed = [
+                c["fingerprint"] for c in await asyncio.to_thread(list_checkpoints, 1000, "failed")
+                if c["collection_name"] == version and not c["fingerprint"].startswith("reindex:")
+            ]
+            await asyncio.to_thread(save_checkpoint, build_key, version, status="completed")
+            previous = await self.swap_alias(version)
+            pruned = await self.prune_collection_versions()
+            elapsed = (datetime.now() - started).total_seconds()
+            self.reindex_status.update({
+                "status": "completed",
+                "previous_collection": previous,
+                "pruned": pruned,
+                "missed_live_writes": missed,
+                "seconds": round(elapsed, 1),
+                "finished_at": datetime.now().isoformat()
+            })
+        except Exception as e:
+            count_error("reindex")
+            print(f"❌ Re-index failed, still serving the previous collection: {e}")
+            self.reindex_status.update({"status": "error", "error": str(e), "finished_at": datetime.now().isoformat()})
+            # The partial version is kept so the next re-index of this source resumes into it
+            try:
+                await asyncio.to_thread(save_checkpoint, build_key, version, status="failed", error=str(e))
+            except Exception:
+                pass
+        finally:
+            heartbeat.cancel()
+        return self.reindex_status
+
+    async def start_reindex(self, batches: Iterable[pd.DataFrame], source: str = "web_contracts",
+                            provider: Optional[str] = None, max_rows_per_sec: Optional[float] = None) -> bool:
+        """Run reindex() as a background task; False if one is already running in any worker"""
+        if self._reindex_task and not self._reindex_task.done():
+            return False
+        claim = None
+        if await self.init_vector_storage():
+            claim = await self._claim_reindex(source, provider or self.embedding_provider)
+            if claim is None:
+                return False
+        self.reindex_status = {"status": "queued", "source": source}
+        self._reindex_task = asyncio.create_task(self.reindex(batches, source, provider, max_rows_per_sec, claim))
+        return True
+
+    @track_stage("get_embeddings")
+    async def get_embeddings(self, texts: List[str], provider: Optional[str] = None) -> List[List[float]]:
+        """Get embeddings using OpenAI or local model
         
-        # Fallback to local model
-        if self.local_model:
-            embeddings = self.local_model.encode(texts)
+        provider pins the model (the one a collection was built with); vectors from
+        the other model would not match, so there is no cross-provider fallback then.
+        """
+        provider = provider or self.embedding_provider
+        if provider == "openai":
+            if not self.openai_client:
+                raise Exception("Collection uses OpenAI embeddings but no OpenAI API key is configured")
+            model, _ = EMBEDDING_MODELS["openai"]
+            # Failures propagate; track_stage counts them in rag_errors_total
+            response = await self.openai_client.embeddings.create(model=model, input=texts)
+            observe_batch("openai", len(texts))
+            count_tokens(model, response.usage)
+            return [item.embedding for item in response.data]
+        
+        # Fallback to local model (encoding is CPU-bound, keep it off the event loop)
+        local_model = await asyncio.to_thread(lambda: self.local_model)
+        if local_model:
+            observe_batch("local", len(texts))
+            embeddings = await asyncio.to_thread(local_model.encode, texts)
             return embeddings.tolist()
         
         raise Exception("No embedding model available")
@@ -117,108 +808,336 @@ class RAGService:
         
         return "\n".join([part for part in text_parts if part.split(": ", 1)[1]])
 
-    async def index_contracts(self, contracts_df: pd.DataFrame) -> Dict[str, Any]:
-        """Index contracts in vector database"""
-        if not self.qdrant_client:
+    @track_stage("index_contracts")
+    async def index_contracts(self, contracts_df: pd.DataFrame, collection_name: Optional[str] = None,
+                              resume: bool = True, max_rows_per_sec: Optional[float] = None) -> Dict[str, Any]:
+        """Index contracts in vector database (the live alias unless collection_name is given)
+        
+        Progress is checkpointed in SQLite under the dataset fingerprint and target
+        collection, so running the same dataset again after a crash or API failure
+        continues from the last checkpoint. Point IDs derive from contract_id, so
+        redone rows overwrite their points instead of duplicating them.
+        
+        Texts are embedded with the model the target collection was built with;
+        max_rows_per_sec paces background work such as re-embedding migrations.
+        
+        While a re-index is building (in any worker), live writes go to the build target
+        as well: rows the build already read past would otherwise vanish from search
+        when the alias swaps. Live writes look the alias up instead of trusting the
+        serving cache, and follow it if it swaps while they run.
+        """
+        target = collection_name or self.collection_name
+        if not await self.init_vector_storage():
             return {"error": "Vector database not available"}
         
+        fingerprint = None
         try:
-            print(f"🔄 Indexing {len(contracts_df)} contracts...")
-            
-            # Prepare documents for embedding
-            documents = []
-            metadata = []
+            # Checkpoints, writes and the embedding model belong to the concrete collection; the alias can move
+            checkpoint_collection = target
+            extra_targets = set()
+            if collection_name is None:
+                extra_targets.update(await self._reindex_targets())
+                checkpoint_collection = await self.get_alias_target() or self.collection_name
+                self._serving = (checkpoint_collection, time.monotonic())
+            elif target == self.collection_name:
+                checkpoint_collection = await self.serving_collection()
+            provider = await self.collection_provider(checkpoint_collection)
             
-            for _, contract in contracts_df.iterrows():
-                doc_text = self.prepare_document_text(contract.to_dict())
-                documents.append(doc_text)
-                
-                # Prepare metadata
-                meta = contract.to_dict()
-                # Convert datetime objects to strings
-                for key, value in meta.items():
-                    if pd.isna(value):
-                        meta[key] = ""
-                    elif hasattr(value, 'isoformat'):
-                        meta[key] = value.isoformat()
-                    else:
-                        meta[key] = str(value)
-                
-                metadata.append(meta)
+            fingerprint = await asyncio.to_thread(dataset_fingerprint, contracts_df)
+            checkpoint = await asyncio.to_thread(get_checkpoint, fingerprint, checkpoint_collection) if resume else None
+            start_row = checkpoint["rows_done"] if checkpoint else 0
+            batches_done = checkpoint["batches_done"] if checkpoint else 0
             
-            # Get embeddings in batches
-            batch_size = 100
-            all_embeddings = []
+            if start_row >= len(contracts_df) and checkpoint and checkpoint["status"] == "completed":
+                print(f"⏭️ Dataset {fingerprint[:12]} already indexed into {checkpoint_collection}")
+                return {
+                    "status": "success",
+                    "indexed_count": 0,
+                    "already_indexed": len(contracts_df),
+                    "collection_name": target,
+                    "timestamp": datetime.now().isoformat()
+                }
             
-            for i in range(0, len(documents), batch_size):
-                batch_docs = documents[i:i + batch_size]
-                batch_embeddings = await self.get_embeddings(batch_docs)
-                all_embeddings.extend(batch_embeddings)
-                print(f"✅ Processed batch {i//batch_size + 1}/{(len(documents)-1)//batch_size + 1}")
+            if start_row:
+                print(f"⏩ Resuming indexing of {len(contracts_df)} contracts from row {start_row}")
+            else:
+                print(f"🔄 Indexing {len(contracts_df)} contracts...")
+            await asyncio.to_thread(
+                save_checkpoint, fingerprint, checkpoint_collection,
+                status="running", rows_total=len(contracts_df), rows_done=start_row,
+                batches_done=batches_done, error=None
+            )
             
-            # Store in Qdrant
-            points = []
-            for i, (embedding, meta) in enumerate(zip(all_embeddings, metadata)):
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload=meta
-                )
-                points.append(point)
+            from qdrant_client.models import PointStruct
+            total_batches = (len(contracts_df) - 1) // INDEX_BATCH_SIZE + 1
+            paced_from = time.monotonic()
             
-            # Upload to Qdrant in batches
-            for i in range(0, len(points), batch_size):
-                batch_points = points[i:i + batch_size]
-                self.qdrant_client.upsert(
-                    collection_name=self.collection_name,
-                    points=batch_points
-                )
+            for i in range(start_row, len(contracts_df), INDEX_BATCH_SIZE):
+                batch = contracts_df.iloc[i:i + INDEX_BATCH_SIZE]
+                
+                # Prepare documents for embedding
+                documents = []
+                metadata = []
+                for contract in batch.to_dict("records"):
+                    documents.append(self.prepare_document_text(contract))
+                    
+                    # Prepare metadata (same string forms as records hydrated for slim payloads)
+                    meta = {key: payload_value(value) for key, value in contract.items()}
+                    if QDRANT_PAYLOAD_MODE == "slim":
+                        absent = [col for col in RECORD_COLUMNS if col not in meta]
+                        meta = {
+                            key: value for key, value in meta.items()
+                            if key in SLIM_PAYLOAD_FIELDS or key not in RECORD_COLUMNS
+                        }
+                        meta[SLIM_PAYLOAD_MARKER] = absent
+                    metadata.append(meta)
+                
+                embeddings = await self.get_embeddings(documents, provider=provider)
+                points = [
+                    PointStruct(id=point_id(meta.get("contract_id"), fingerprint, position), vector=embedding, payload=meta)
+                    for position, (embedding, meta) in enumerate(zip(embeddings, metadata), i)
+                ]
+                
+                with stage_timer("qdrant_upsert"):
+                    await self._qdrant_call(
+                        "upsert",
+                        collection_name=checkpoint_collection,
+                        points=points,
+                        bulk=True
+                    )
+                # Search keys start with the concrete collection; builds nobody queries leave the cache alone
+                self._search_cache.discard_where(lambda key: key[0] == checkpoint_collection)
+                
+                batches_done += 1
+                rows_done = i + len(batch)
+                if batches_done % INDEX_CHECKPOINT_INTERVAL == 0 or rows_done == len(contracts_df):
+                    await asyncio.to_thread(
+                        save_checkpoint, fingerprint, checkpoint_collection,
+                        rows_done=rows_done, batches_done=batches_done
+                    )
+                print(f"✅ Processed batch {i // INDEX_BATCH_SIZE + 1}/{total_batches}")
+                
+                if max_rows_per_sec:
+                    ahead = (rows_done - start_row) / max_rows_per_sec - (time.monotonic() - paced_from)
+                    if ahead > 0:
+                        await asyncio.sleep(ahead)
             
-            print(f"✅ Successfully indexed {len(contracts_df)} contracts")
+            await asyncio.to_thread(save_checkpoint, fingerprint, checkpoint_collection, status="completed")
+            print(f"✅ Successfully indexed {len(contracts_df) - start_row} contracts")
             
-            return {
+            result = {
                 "status": "success",
-                "indexed_count": len(contracts_df),
-                "collection_name": self.collection_name,
+                "indexed_count": len(contracts_df) - start_row,
+                "resumed_from": start_row,
+                "collection_name": target,
                 "timestamp": datetime.now().isoformat()
             }
             
+            if collection_name is None:
+                # Builds that started, and an alias swap that happened, while this write ran
+                extra_targets.update(await self._reindex_targets())
+                extra_targets.add(await self.get_alias_target() or self.collection_name)
+                extra_targets.discard(checkpoint_collection)
+                for extra in sorted(extra_targets):
+                    build = await self.index_contracts(contracts_df, collection_name=extra)
+                    result.setdefault("reindex_collections", []).append(extra)
+                    if "error" in build:
+                        # Live write succeeded; the build is missing these rows (its checkpoint records the failure)
+                        result.setdefault("reindex_errors", {})[extra] = build["error"]
+                        print(f"⚠️ Rows indexed live but not into {extra}: {build['error']}")
+            return result
+            
         except Exception as e:
+            count_error("index_contracts")
             print(f"❌ Error indexing contracts: {e}")
+            if fingerprint:
+                try:
+                    await asyncio.to_thread(
+                        save_checkpoint, fingerprint, checkpoint_collection, status="failed", error=str(e)
+                    )
+                except Exception:
+                    pass
             return {"error": str(e)}
 
-    async def semantic_search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Perform semantic search on indexed contracts"""
-        if not self.qdrant_client:
+    @track_stage("semantic_search")
+    async def semantic_search(self, query: str, limit: int = 10,
+                              fields: Optional[List[str]] = None, offset: int = 0,
+                              score_threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Perform semantic search on indexed contracts
+        
+        fields limits the payload keys Qdrant returns for each hit; offset pages
+        through results and score_threshold drops weak matches inside Qdrant.
+        Hits with slim payloads are completed from the web_contracts table in one query.
+        Results are cached per question and page; a cached longer page serves shorter ones.
+        """
+        if not await self.init_vector_storage():
             return []
         
         try:
-            # Get query embedding
-            query_embedding = await self.get_embeddings([query])
-            
-            # Search in Qdrant
-            search_results = self.qdrant_client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding[0],
-                limit=limit
-            )
-            
-            # Format results
-            results = []
-            for result in search_results:
-                contract = result.payload
-                contract['similarity_score'] = result.score
-                results.append(contract)
+            collection = await self.serving_collection()
+            key = self._search_key(collection, query, fields, offset, score_threshold)
+            # A page of `stored` hits covers `limit` if it is as long, or if it was the last page
+            cached = self._search_cache.get(key, usable=lambda entry: entry[0] >= limit or len(entry[1]) < entry[0])
+            if cached:
+                return [dict(contract) for contract in cached[1][:limit]]
             
+            try:
+                results = await self._search(collection, query, limit, fields, offset, score_threshold)
+            except Exception as e:
+                if is_transient_qdrant_error(e):
+                    raise
+                # Client errors are not retried by _qdrant_call, but the cached collection may have
+                # been swapped out and dropped (by this or another worker): look the alias up again
+                self._serving = None
+                await asyncio.sleep(QDRANT_RETRY_BACKOFF)
+                collection = await self.serving_collection()
+                key = self._search_key(collection, query, fields, offset, score_threshold)
+                results = await self._search(collection, query, limit, fields, offset, score_threshold)
+            if results:
+                self._search_cache.put(key, (limit, [dict(contract) for contract in results]))
             return results
             
         except Exception as e:
+            count_error("semantic_search")
             print(f"❌ Error in semantic search: {e}")
             return []
 
+    def _search_key(self, collection: str, query: str, fields: Optional[List[str]] = None,
+                    offset: int = 0, score_threshold: Optional[float] = None) -> tuple:
+        return (collection, self.normalize_question(query), tuple(sorted(fields)) if fields else None,
+                offset, score_threshold)
+
+    async def embed_query(self, query: str, provider: str) -> List[float]:
+        """Query embedding, cached per provider and normalized question"""
+        key = (provider, self.normalize_question(query))
+        cached = self._embedding_cache.get(key)
+        if cached is not None:
+            return cached
+        vector = (await self.get_embeddings([query], provider=provider))[0]
+        self._embedding_cache.put(key, vector)
+        return vector
+
+    async def _search(self, collection: str, query: str, limit: int, fields: Optional[List[str]] = None,
+                      offset: int = 0, score_threshold: Optional[float] = None,
+                      query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        # Embed the query with the model the served collection was built with
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query, await self.collection_provider(collection))
+        
+        # Search in Qdrant
+        with stage_timer("qdrant_search"):
+            search_results = await self._qdrant_call(
+                "search",
+                timeout=QDRANT_SEARCH_TIMEOUT,
+                retries=QDRANT_SEARCH_RETRIES,
+                collection_name=collection,
+                query_vector=query_embedding,
+                limit=limit,
+                offset=offset,
+                score_threshold=score_threshold,
+                with_payload=list(set(fields) | {"contract_id", SLIM_PAYLOAD_MARKER}) if fields else True
+            )
+        
+        # Format results
+        results = []
+        for result in search_results:
+            contract = result.payload
+            contract['similarity_score'] = result.score
+            results.append(contract)
+        
+        # contract -> record columns its source row lacked (True on points written before that was tracked)
+        slim = [(contract, contract.pop(SLIM_PAYLOAD_MARKER)) for contract in results if SLIM_PAYLOAD_MARKER in contract]
+        hydrated = set(RECORD_COLUMNS) - set(SLIM_PAYLOAD_FIELDS)
+        if slim and (not fields or set(fields) & hydrated):
+            with stage_timer("hydrate_records"):
+                records = await asyncio.to_thread(
+                    fetch_contracts, [contract.get("contract_id") for contract, _ in slim], fields
+                )
+            for contract, absent in slim:
+                record = records.get(contract.get("contract_id"), {})
+                skip = set(absent) if isinstance(absent, list) else set()
+                contract.update({key: value for key, value in record.items() if key not in skip})
+        
+        return results
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Case- and whitespace-insensitive form of a question, used as a dedup key"""
+        return " ".join(question.casefold().split())
+
+    @track_stage("rag_query")
     async def rag_query(self, question: str, max_context_length: int = 4000) -> Dict[str, Any]:
-        """Perform RAG query with context retrieval and AI response"""
+        """Perform RAG query with context retrieval and AI response
+        
+        Concurrent calls with the same normalized question and parameters share
+        one in-flight computation (single flight) instead of each embedding,
+        searching and calling OpenAI, unless RAG_QUERY_COALESCING is off.
+        """
+        self._log_question(question)
+        if not RAG_QUERY_COALESCING:
+            result = await self._run_rag_query(question, max_context_length)
+            return {**result, "query": question}
+        key = (self.normalize_question(question), max_context_length)
+        inflight = self._inflight_queries.get(key)
+        if inflight is None:
+            count_cache("rag_query_inflight", hit=False)
+            inflight = asyncio.ensure_future(self._run_rag_query(question, max_context_length))
+            self._inflight_queries[key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight_queries.pop(key, None))
+        else:
+            count_cache("rag_query_inflight", hit=True)
+            self.coalesced_queries += 1
+        
+        # Shielded so one caller disconnecting does not cancel the shared computation
+        result = await asyncio.shield(inflight)
+        return {**result, "sources": list(result["sources"]), "query": question}
+
+    def _log_question(self, question: str):
+        """Count the question in the persisted log without delaying the query"""
+        if not QUESTION_LOG_ENABLED:
+            return
+        task = asyncio.ensure_future(asyncio.to_thread(self._record_question, question))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _record_question(self, question: str):
+        try:
+            record_question(self.normalize_question(question), question)
+        except Exception as e:
+            count_error("question_log")
+            print(f"⚠️ Could not log question: {e}")
+
+    def coalescing_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": RAG_QUERY_COALESCING,
+            "in_flight": len(self._inflight_queries),
+            "coalesced": self.coalesced_queries
+        }
+
+    def routing_stats(self) -> Dict[str, Any]:
+        return {"enabled": QUERY_ROUTER_ENABLED, **self.route_counts}
+
+    async def _answer_analytical(self, question: str) -> Optional[Dict[str, Any]]:
+        """Aggregate/ranking questions answered with SQL over every stored contract"""
+        if not QUERY_ROUTER_ENABLED:
+            return None
         try:
+            with stage_timer("analytics_query"):
+                return await asyncio.to_thread(answer_analytical, question)
+        except Exception as e:
+            count_error("analytics_query")
+            print(f"⚠️ Analytical route failed, using retrieval: {e}")
+            return None
+
+    async def _run_rag_query(self, question: str, max_context_length: int) -> Dict[str, Any]:
+        try:
+            # Step 0: Aggregates and rankings need the full dataset, not five similar contracts
+            analytical = await self._answer_analytical(question)
+            if analytical:
+                self.route_counts["analytics"] += 1
+                return {**analytical, "query": question, "route": "analytics"}
+            self.route_counts["retrieval"] += 1
+            
             # Step 1: Semantic search for relevant contracts
             relevant_contracts = await self.semantic_search(question, limit=5)
             
@@ -226,28 +1145,30 @@ class RAGService:
                 return {
                     "answer": "I couldn't find any relevant contracts for your question.",
                     "sources": [],
-                    "query": question
+                    "query": question,
+                    "route": "retrieval"
                 }
             
             # Step 2: Prepare context from retrieved contracts
-            context_parts = []
-            sources = []
-            
-            for contract in relevant_contracts:
-                context_text = self.prepare_document_text(contract)
-                context_parts.append(f"Contract {contract.get('contract_id', 'Unknown')}:\n{context_text}")
-                sources.append({
-                    "contract_id": contract.get('contract_id'),
-                    "client_company": contract.get('client_company'),
-                    "project_title": contract.get('project_title'),
-                    "similarity_score": contract.get('similarity_score', 0)
-                })
-            
-            context = "\n\n".join(context_parts)
-            
-            # Truncate context if too long
-            if len(context) > max_context_length:
-                context = context[:max_context_length] + "..."
+            with stage_timer("build_context"):
+                context_parts = []
+                sources = []
+                
+                for contract in relevant_contracts:
+                    context_text = self.prepare_document_text(contract)
+                    context_parts.append(f"Contract {contract.get('contract_id', 'Unknown')}:\n{context_text}")
+                    sources.append({
+                        "contract_id": contract.get('contract_id'),
+                        "client_company": contract.get('client_company'),
+                        "project_title": contract.get('project_title'),
+                        "similarity_score": contract.get('similarity_score', 0)
+                    })
+                
+                context = "\n\n".join(context_parts)
+                
+                # Truncate context if too long
+                if len(context) > max_context_length:
+                    context = context[:max_context_length] + "..."
             
             # Step 3: Generate AI response
             if self.use_openai and self.openai_client:
@@ -259,11 +1180,13 @@ class RAGService:
                 "answer": answer,
                 "sources": sources,
                 "query": question,
+                "route": "retrieval",
                 "context_length": len(context),
                 "contracts_found": len(relevant_contracts)
             }
             
         except Exception as e:
+            count_error("rag_query")
             print(f"❌ Error in RAG query: {e}")
             return {
                 "answer": f"An error occurred: {str(e)}",
@@ -271,6 +1194,7 @@ class RAGService:
                 "query": question
             }
 
+    @track_stage("generate_openai_response")
     async def generate_openai_response(self, question: str, context: str) -> str:
         """Generate response using OpenAI GPT"""
         try:
@@ -302,10 +1226,12 @@ ANSWER:
                 max_tokens=500,
                 temperature=0.3
             )
+            count_tokens("gpt-3.5-turbo", response.usage)
             
             return response.choices[0].message.content.strip()
             
         except Exception as e:
+            count_error("generate_openai_response")
             print(f"❌ OpenAI API error: {e}")
             return self.generate_fallback_response(question, [])
 
@@ -314,8 +1240,15 @@ ANSWER:
         if not contracts:
             return "I found no relevant contracts for your question. Please try a different query."
         
+        # Payload values are strings; missing values are stored as ""
+        def value_of(contract: Dict) -> float:
+            try:
+                return float(contract.get('contract_value') or 0)
+            except (TypeError, ValueError):
+                return 0.0
+        
         # Basic analysis based on retrieved contracts
-        total_value = sum(float(c.get('contract_value', 0)) for c in contracts)
+        total_value = sum(value_of(c) for c in contracts)
         avg_value = total_value / len(contracts) if contracts else 0
         
         contract_types = [c.get('contract_type', 'Unknown') for c in contracts]
@@ -335,20 +1268,25 @@ ANSWER:
             response += f"""
 {i}. {contract.get('project_title', 'Untitled Project')}
    - Client: {contract.get('client_company', 'Unknown')}
-   - Value: ${contract.get('contract_value', 0):,.2f}
+   - Value: ${value_of(contract):,.2f}
    - Status: {contract.get('status', 'Unknown')}"""
 
         return response
 
-    def get_collection_stats(self) -> Dict[str, Any]:
+    async def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the indexed collection"""
-        if not self.qdrant_client:
+        if not await self.init_vector_storage():
             return {"error": "Vector database not available"}
         
         try:
-            collection_info = self.qdrant_client.get_collection(self.collection_name)
+            collection_info = await self._qdrant_call("get_collection", self.collection_name)
             return {
                 "collection_name": self.collection_name,
+                "serving_collection": await self.serving_collection(),
+                "payload_mode": QDRANT_PAYLOAD_MODE,
+                "embedding": await self.embedding_status(),
+                "versions": await self.list_collection_versions(),
+                "reindex": self.reindex_status,
                 "points_count": collection_info.points_count,
                 "vector_size": collection_info.config.params.vectors.size,
                 "distance_metric": collection_info.config.params.vectors.distance.value
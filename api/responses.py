@@ -0,0 +1,45 @@
+"""
+Response helpers for Laika Dynamics RAG System
+Fast JSON serialization and response compression
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+# orjson is optional - fall back to the standard JSON response
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    from fastapi.responses import JSONResponse as FastJSONResponse
+    ORJSON_AVAILABLE = False
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+
+def add_compression(app) -> str:
+    """Compress responses above COMPRESSION_MINIMUM_SIZE; brotli when available, else gzip"""
+    try:
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(
+            BrotliMiddleware,
+            quality=BROTLI_QUALITY,
+            minimum_size=COMPRESSION_MINIMUM_SIZE,
+            gzip_fallback=True
+        )
+        return "br, gzip"
+    except ImportError:
+        from starlette.middleware.gzip import GZipMiddleware
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE)
+        return "gzip"
+
+
+def project_fields(records: List[Dict[str, Any]], fields: Optional[List[str]],
+                   always: tuple = ("contract_id", "similarity_score")) -> List[Dict[str, Any]]:
+    """Keep only the requested keys (plus identifying ones) in each record"""
+    if not fields:
+        return records
+    keep = set(fields) | set(always)
+    return [{key: value for key, value in record.items() if key in keep} for record in records]
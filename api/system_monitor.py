@@ -0,0 +1,109 @@
+"""
+System resource sampler for Laika Dynamics RAG System
+Collects CPU, memory, disk and process stats on an interval into a ring buffer
+"""
+
+import os
+import platform
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+SYSTEM_SAMPLE_INTERVAL = float(os.getenv("SYSTEM_SAMPLE_INTERVAL", "5"))
+SYSTEM_HISTORY_SIZE = int(os.getenv("SYSTEM_HISTORY_SIZE", "120"))  # 10 minutes at 5s
+
+
+class SystemMonitor:
+    """Background sampler so endpoints read resource stats without blocking"""
+
+    def __init__(self, interval: float = None, history_size: int = None, disk_path: str = "/"):
+        self.interval = interval or SYSTEM_SAMPLE_INTERVAL
+        self.disk_path = disk_path
+        self.history: deque = deque(maxlen=history_size or SYSTEM_HISTORY_SIZE)
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._static_info: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        # Prime the CPU counters; cpu_percent(interval=None) reports usage since the previous call
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="system-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        self.static_info()
+        while not self._stop.wait(self.interval if self.history else 0.5):
+            try:
+                self.history.append(self.sample())
+            except Exception as e:
+                print(f"⚠️ System sampling failed: {e}")
+
+    def sample(self) -> Dict[str, Any]:
+        """Take one snapshot of system and process resources"""
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        with self._process.oneshot():
+            process_memory = self._process.memory_info()
+            process = {
+                "pid": self._process.pid,
+                "cpu_percent": self._process.cpu_percent(interval=None),
+                "rss_mb": round(process_memory.rss / (1024**2), 1),
+                "threads": self._process.num_threads(),
+                "open_files": self._process.num_fds() if hasattr(self._process, "num_fds") else None
+            }
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "load_average": list(os.getloadavg()) if hasattr(os, "getloadavg") else None,
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "percent": memory.percent
+            },
+            "disk": {
+                "total": disk.total,
+                "free": disk.free,
+                "percent": disk.percent
+            },
+            "process": process
+        }
+
+    def latest(self) -> Dict[str, Any]:
+        """Most recent sample (taken synchronously only if the sampler has not run yet)"""
+        if self.history:
+            return self.history[-1]
+        sample = self.sample()
+        self.history.append(sample)
+        return sample
+
+    def series(self, limit: int = None) -> List[Dict[str, Any]]:
+        samples = list(self.history)
+        return samples[-limit:] if limit else samples
+
+    def static_info(self) -> Dict[str, Any]:
+        """Platform details that never change (platform.processor() can shell out, so cache it)"""
+        if self._static_info is None:
+            self._static_info = {
+                "os": platform.system(),
+                "os_release": platform.release(),
+                "distribution": platform.platform(),
+                "architecture": platform.architecture()[0],
+                "machine": platform.machine(),
+                "processor": platform.processor(),
+                "python_version": platform.python_version(),
+                "hostname": platform.node(),
+                "cpu_count": psutil.cpu_count()
+            }
+        return self._static_info
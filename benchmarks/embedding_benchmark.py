@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Local embedding backend benchmark for Laika Dynamics RAG System
+Compares sentence-transformers (PyTorch CPU) with ONNX Runtime fp32/int8 on generated contract text:
+throughput, cosine parity against the PyTorch vectors and top-k retrieval agreement.
+
+Usage (from the repository root):
+    python -m benchmarks.embedding_benchmark --rows 2000 --output embed_bench.json
+    python -m benchmarks.embedding_benchmark --check  # exit 1 if int8 parity drops below --min-cosine
+                                                      # or int8 is not --min-speedup faster than torch
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def contract_texts(rows: int) -> List[str]:
+    """Document texts exactly as index_contracts builds them"""
+    from api.data_generator import WebContractDataGenerator
+    from api.rag_service import RAGService
+
+    dataset = WebContractDataGenerator().generate_base_dataset(rows)
+    rag = RAGService()
+    return [rag.prepare_document_text(contract) for contract in dataset.to_dict("records")]
+
+
+def time_encode(model, texts: List[str], batch_size: int, repeats: int) -> Dict[str, Any]:
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+    runs = []
+    vectors = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        vectors = np.asarray(model.encode(texts, batch_size=batch_size))
+        runs.append(time.perf_counter() - started)
+    best = min(runs)
+    return {
+        "vectors": vectors,
+        "seconds": round(best, 3),
+        "texts_per_sec": round(len(texts) / best, 1)
+    }
+
+
+def parity(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Row-wise cosine similarity between two embeddings of the same texts"""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosine = (reference * candidate).sum(axis=1)
+    return {
+        "mean_cosine": round(float(cosine.mean()), 5),
+        "min_cosine": round(float(cosine.min()), 5),
+        "p01_cosine": round(float(np.percentile(cosine, 1)), 5)
+    }
+
+
+def topk_agreement(reference_docs, candidate_docs, reference_queries, candidate_queries, k: int) -> float:
+    """Mean overlap of the top-k documents each backend retrieves for the same queries"""
+    overlaps = []
+    for ref_q, cand_q in zip(reference_queries, candidate_queries):
+        ref_top = set(np.argsort(-(reference_docs @ ref_q))[:k])
+        cand_top = set(np.argsort(-(candidate_docs @ cand_q))[:k])
+        overlaps.append(len(ref_top & cand_top) / k)
+    return round(float(np.mean(overlaps)), 4)
+
+
+def benchmark(args) -> Dict[str, Any]:
+    from api.main import EXAMPLE_QUERIES
+    from api.onnx_embedder import OnnxEmbedder, quantization_target
+
+    print(f"🎯 Generating {args.rows} contract texts...")
+    texts = contract_texts(args.rows)
+    queries = EXAMPLE_QUERIES
+
+    results: Dict[str, Any] = {
+        "benchmark": "local_embeddings",
+        "timestamp": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {
+            "model": args.model,
+            "rows": len(texts),
+            "mean_chars": round(float(np.mean([len(t) for t in texts])), 1),
+            "batch_size": args.batch_size,
+            "threads": args.threads,
+            "quantization_target": quantization_target()
+        },
+        "backends": {}
+    }
+
+    print("⏱️ sentence-transformers (PyTorch CPU)")
+    from sentence_transformers import SentenceTransformer
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch_model = SentenceTransformer(args.model, device="cpu")
+    reference = time_encode(torch_model, texts, args.batch_size, args.repeats)
+    reference_queries = np.asarray(torch_model.encode(queries))
+    results["backends"]["torch"] = {k: v for k, v in reference.items() if k != "vectors"}
+
+    for quantize in (False, True):
+        name = "onnx_int8" if quantize else "onnx_fp32"
+        print(f"⏱️ {name}")
+        model = OnnxEmbedder(args.model, quantize=quantize, intra_op_threads=args.threads or None)
+        # Both backends sort each call by length before batching, so the speedup is the backend alone
+        timing = time_encode(model, texts, args.batch_size, args.repeats)
+        entry = {k: v for k, v in timing.items() if k != "vectors"}
+        entry["speedup_vs_torch"] = round(reference["seconds"] / timing["seconds"], 2)
+        entry["parity"] = parity(reference["vectors"], timing["vectors"])
+        entry["parity"][f"top{args.top_k}_agreement"] = topk_agreement(
+            reference["vectors"], timing["vectors"], reference_queries, model.encode(queries), args.top_k
+        )
+        results["backends"][name] = entry
+
+    int8 = results["backends"]["onnx_int8"]
+    results["parity_check"] = {
+        "min_cosine_required": args.min_cosine,
+        "passed": int8["parity"]["min_cosine"] >= args.min_cosine
+    }
+    # Same batching on both sides, so this is the backend's own gain
+    results["speedup_check"] = {
+        "min_speedup_required": args.min_speedup,
+        "int8_speedup_vs_torch": int8["speedup_vs_torch"],
+        "passed": int8["speedup_vs_torch"] >= args.min_speedup
+    }
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark local embedding backends")
+    parser.add_argument("--model", default=os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+    parser.add_argument("--rows", type=int, default=2000, help="Generated contracts to embed")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads for both backends (0 = default)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per backend (best is reported)")
+    parser.add_argument("--top-k", type=int, default=10, help="k for retrieval agreement on EXAMPLE_QUERIES")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="Minimum int8 row cosine for --check")
+    parser.add_argument("--min-speedup", type=float, default=1.0,
+                        help="Minimum int8 speedup over torch on the same fixed batches for --check")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if the parity or speedup check fails")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = benchmark(args)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"💾 Results written to {args.output}")
+    else:
+        print(output)
+    if args.check:
+        failed = False
+        if not results["parity_check"]["passed"]:
+            print(f"❌ int8 parity below {args.min_cosine}")
+            failed = True
+        if not results["speedup_check"]["passed"]:
+            print(f"❌ int8 speedup {results['speedup_check']['int8_speedup_vs_torch']}x below {args.min_speedup}x")
+            failed = True
+        if failed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
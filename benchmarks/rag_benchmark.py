@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+RAG pipeline benchmark for Laika Dynamics RAG System
+Measures indexing throughput, search latency percentiles and QPS under concurrency
+against local stand-ins: local embeddings, in-process Qdrant and a mock chat-completion server.
+
+Usage (from the repository root):
+    python -m benchmarks.rag_benchmark --rows 10000 --output bench.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder - a dependency-free stand-in for the local model"""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+                index = int.from_bytes(digest[:4], "little") % self.dimension
+                vectors[row, index] += 1.0 if digest[4] & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+# ==================== MOCK CHAT COMPLETION SERVER ====================
+
+def start_mock_openai_server(latency_ms: float) -> str:
+    """Serve an OpenAI-compatible /v1/chat/completions endpoint in a background thread"""
+    import uvicorn
+    from fastapi import FastAPI
+
+    mock = FastAPI()
+
+    @mock.post("/v1/chat/completions")
+    async def chat_completions(body: Dict[str, Any]):
+        await asyncio.sleep(latency_ms / 1000)
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        return {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "Mock answer for benchmarking."},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": len(prompt.split()),
+                "completion_tokens": 5,
+                "total_tokens": len(prompt.split()) + 5
+            }
+        }
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(mock, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="mock-openai", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+# ==================== MEASUREMENT HELPERS ====================
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """Percentiles in milliseconds"""
+    if not samples:
+        return {}
+    ms = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3)
+    }
+
+
+async def run_concurrent(operation, queries: List[str], total: int, concurrency: int) -> Dict[str, Any]:
+    """Issue `total` calls with at most `concurrency` in flight; report QPS and latency"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await operation(queries[i % len(queries)])
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "qps": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency": latency_summary(latencies)
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+# ==================== BENCHMARK ====================
+
+def build_dataset(args):
+    from api.data_generator import WebContractDataGenerator
+    from api.dataset_io import read_dataset, write_dataset
+
+    if args.dataset and os.path.exists(args.dataset):
+        print(f"📂 Reusing dataset {args.dataset}")
+        return read_dataset(args.dataset)
+
+    print(f"🎯 Generating {args.rows} contracts...")
+    generator = WebContractDataGenerator()
+    if args.ctgan:
+        base = max(args.rows // 4, 1)
+        dataset = generator.generate_complete_dataset(base, args.rows - base)
+    else:
+        dataset = generator.generate_base_dataset(args.rows)
+        # Base IDs repeat across years; keep them unique so point counts match row counts
+        dataset["contract_id"] = [f"BENCH-{i:07d}" for i in range(len(dataset))]
+
+    if args.dataset:
+        write_dataset(dataset, args.dataset)
+    return dataset
+
+
+async def benchmark(args) -> Dict[str, Any]:
+    from api.models import create_tables
+    from api.rag_service import RAGService
+    from api.main import EXAMPLE_QUERIES
+
+    dataset = build_dataset(args)
+
+    # index_contracts writes checkpoints and collection embedding tags
+    create_tables()
+    rag = RAGService(openai_api_key="sk-benchmark" if args.mock_openai else None)
+    if args.embeddings == "hash":
+        rag._local_model = HashingEmbedder()
+
+    results: Dict[str, Any] = {
+        "benchmark": "rag_pipeline",
+        "timestamp": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {
+            "rows": len(dataset),
+            "embeddings": args.embeddings,
+            "qdrant": os.environ.get("QDRANT_URL") or os.environ.get("QDRANT_LOCATION"),
+            "database": os.environ.get("DATABASE_URL"),
+            "mock_openai_latency_ms": args.mock_latency_ms if args.mock_openai else None,
+            "index_batch_rows": args.index_batch,
+            "query_caches": args.with_cache,
+            "rag_query_coalescing": args.with_cache,
+            "concurrency_levels": args.concurrency
+        }
+    }
+
+    # Indexing throughput
+    print(f"🔄 Indexing {len(dataset)} contracts...")
+    index_started = time.perf_counter()
+    for i in range(0, len(dataset), args.index_batch):
+        outcome = await rag.index_contracts(dataset.iloc[i:i + args.index_batch])
+        if "error" in outcome:
+            raise RuntimeError(f"Indexing failed: {outcome['error']}")
+    index_seconds = time.perf_counter() - index_started
+    results["indexing"] = {
+        "rows": len(dataset),
+        "seconds": round(index_seconds, 3),
+        "rows_per_sec": round(len(dataset) / index_seconds, 1) if index_seconds > 0 else 0.0
+    }
+
+    queries = EXAMPLE_QUERIES
+
+    async def search(question: str):
+        await rag.semantic_search(question, args.limit)
+
+    async def query(question: str):
+        await rag.rag_query(question)
+
+    # Warm the query path once so model/client setup is not counted
+    await search(queries[0])
+
+    results["semantic_search"] = []
+    results["rag_query"] = []
+    for concurrency in args.concurrency:
+        print(f"⏱️ semantic_search x{args.requests} @ concurrency {concurrency}")
+        results["semantic_search"].append(await run_concurrent(search, queries, args.requests, concurrency))
+        print(f"⏱️ rag_query x{args.requests} @ concurrency {concurrency}")
+        results["rag_query"].append(await run_concurrent(query, queries, args.requests, concurrency))
+
+    results["rag_query_coalescing"] = rag.coalescing_stats()
+    await rag.close()
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Laika Dynamics RAG pipeline")
+    parser.add_argument("--rows", type=int, default=1000, help="Contracts to generate (1k-1M)")
+    parser.add_argument("--dataset", help="Parquet/CSV path to reuse (written after generation if missing)")
+    parser.add_argument("--ctgan", action="store_true", help="Generate with CTGAN instead of Faker only")
+    parser.add_argument("--embeddings", choices=["local", "hash"], default="local",
+                        help="local = sentence-transformers model, hash = dependency-free stand-in")
+    parser.add_argument("--qdrant-url", help="Local Qdrant server URL (default: in-process :memory:)")
+    parser.add_argument("--no-mock-openai", dest="mock_openai", action="store_false",
+                        help="Skip the mock chat server; rag_query uses the fallback answer")
+    parser.add_argument("--mock-latency-ms", type=float, default=50.0, help="Mock completion latency")
+    parser.add_argument("--index-batch", type=int, default=10000, help="Rows per index_contracts call")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--limit", type=int, default=10, help="Search result limit")
+    parser.add_argument("--with-cache", action="store_true",
+                        help="Keep the query caches and rag_query coalescing on (the repeated queries then measure cache hits and shared in-flight work)")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Connection settings are read at import time, so configure the environment first
+    if args.qdrant_url:
+        os.environ["QDRANT_URL"] = args.qdrant_url
+    else:
+        os.environ.setdefault("QDRANT_LOCATION", ":memory:")
+    os.environ["EMBEDDING_PROVIDER"] = "local"
+    if not args.with_cache:
+        os.environ["QUERY_EMBEDDING_CACHE_SIZE"] = "0"
+        os.environ["SEARCH_CACHE_SIZE"] = "0"
+        # Repeated EXAMPLE_QUERIES in flight together would otherwise share one computation
+        os.environ["RAG_QUERY_COALESCING"] = "false"
+    # Benchmark questions must not end up in the warm set of a real deployment
+    os.environ["QUESTION_LOG_ENABLED"] = "false"
+    # Checkpoints, embedding tags and the question log go to a throwaway database, not ./laika_rag.db
+    database_dir = tempfile.TemporaryDirectory(prefix="rag-benchmark-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(database_dir.name, 'benchmark.db')}"
+    if args.mock_openai:
+        os.environ["OPENAI_BASE_URL"] = start_mock_openai_server(args.mock_latency_ms)
+
+    try:
+        results = asyncio.run(benchmark(args))
+    finally:
+        database_dir.cleanup()
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"💾 Results written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,14 @@
 import os
 import json
+import threading
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
@@ -26,7 +29,6 @@ try:
 except ImportError:
     from langchain.vectorstores import Chroma
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chains import RetrievalQA
 from langchain.schema import Document
 
@@ -47,12 +49,93 @@ app.add_middleware(
 # Global variables
 openai_api_key = None
 
+# Persistent Chroma store - uploads are appended to it rather than replacing it
+CHROMA_DIR = os.getenv("CHROMA_DIR", "./data/chroma_db")
+CHROMA_COLLECTION = os.getenv("CHROMA_COLLECTION", "langchain")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = 3
+
+# Row-aware chunking: one record per chunk unless it exceeds CHUNK_MAX_CHARS
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "2000"))
+ROW_ID_COLUMN = os.getenv("ROW_ID_COLUMN")  # default: first "id" / "*_id" column, else row number
+
+def find_row_id_column(columns) -> Optional[str]:
+    if ROW_ID_COLUMN and ROW_ID_COLUMN in columns:
+        return ROW_ID_COLUMN
+    for col in columns:
+        name = str(col).lower()
+        if name == "id" or name.endswith("_id"):
+            return col
+    return None
+
+def split_long_field(col: str, value: str, max_chars: int) -> List[str]:
+    """Split one oversized free-text field on whitespace; every piece keeps its column label"""
+    budget = max(max_chars - len(f"{col}: "), 1)
+    pieces, current = [], ""
+    for word in value.split():
+        if current and len(current) + 1 + len(word) > budget:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return [f"{col}: {piece}" for piece in pieces]
+
+def chunk_rows(df: pd.DataFrame, max_chars: int = CHUNK_MAX_CHARS):
+    """Turn table rows into chunks: one per row when it fits, otherwise split on field boundaries
+
+    Chunks of a split row each start with the row's ID field so they stay attributable.
+    Returns (texts, metadatas) with row, row_id and part in every metadata dict.
+    """
+    columns = list(df.columns)
+    id_col = find_row_id_column(columns)
+    id_index = columns.index(id_col) if id_col is not None else None
+    texts, metadatas = [], []
+    
+    for position, values in enumerate(df.itertuples(index=False, name=None)):
+        fields = [
+            (col, str(val).strip()) for col, val in zip(columns, values)
+            if pd.notna(val) and str(val).strip()
+        ]
+        if not fields:
+            continue
+        
+        row_id = values[id_index] if id_index is not None else None
+        row_id = str(row_id).strip() if row_id is not None and pd.notna(row_id) else str(position)
+        
+        text = " | ".join(f"{col}: {val}" for col, val in fields)
+        if len(text) <= max_chars:
+            parts = [text]
+        else:
+            header = f"{id_col or 'row'}: {row_id}"
+            parts, current = [], header
+            for col, val in fields:
+                if col == id_col:
+                    continue
+                field = f"{col}: {val}"
+                segments = [field] if len(header) + 3 + len(field) <= max_chars else split_long_field(col, val, max_chars - len(header) - 3)
+                for segment in segments:
+                    if current != header and len(current) + 3 + len(segment) > max_chars:
+                        parts.append(current)
+                        current = header
+                    current += " | " + segment
+            parts.append(current)
+        
+        for part, chunk in enumerate(parts):
+            texts.append(chunk)
+            metadatas.append({"row": position, "row_id": row_id, "part": part, "parts": len(parts)})
+    
+    return texts, metadatas
+
 class RAGSystem:
     def __init__(self):
         self.embeddings = None
         self.vector_store = None
         self.qa_chain = None
         self.documents = []
+        self.progress = {"status": "idle"}
+        self._ingest_lock = threading.Lock()
     
     def set_openai_key(self, api_key: str):
         global openai_api_key
@@ -70,6 +153,15 @@ class RAGSystem:
             test_result = self.embeddings.embed_query("test")
             print(f"OpenAI embeddings test successful. Vector length: {len(test_result)}")
             
+            # Reopen the persistent store so earlier uploads are queryable with the new key
+            self.vector_store = None
+            self.qa_chain = None
+            try:
+                if self.get_vector_store()._collection.count() > 0:
+                    self.create_qa_chain()
+            except Exception as e:
+                print(f"Could not open existing vector store: {e}")
+            
             return True
         except Exception as e:
             print(f"Error setting OpenAI key: {e}")
@@ -77,13 +169,117 @@ class RAGSystem:
             traceback.print_exc()
             return False
     
+    def get_vector_store(self):
+        """Open (once) the persistent Chroma collection that uploads are appended to"""
+        if self.vector_store is None:
+            os.makedirs(CHROMA_DIR, exist_ok=True)
+            self.vector_store = Chroma(
+                collection_name=CHROMA_COLLECTION,
+                embedding_function=self.embeddings,
+                persist_directory=CHROMA_DIR
+            )
+        return self.vector_store
+    
+    def create_qa_chain(self):
+        if USING_NEW_LANGCHAIN:
+            llm = OpenAI(api_key=openai_api_key, temperature=0)
+        else:
+            llm = OpenAI(openai_api_key=openai_api_key, temperature=0)
+        
+        # The retriever reads the live collection, so later appends are picked up without a rebuild
+        self.qa_chain = RetrievalQA.from_chain_type(
+            llm=llm,
+            chain_type="stuff",
+            retriever=self.get_vector_store().as_retriever(search_kwargs={"k": 3})
+        )
+    
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, retrying transient API failures with backoff"""
+        for attempt in range(EMBED_MAX_RETRIES):
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if attempt == EMBED_MAX_RETRIES - 1:
+                    raise
+                print(f"Embedding batch failed (attempt {attempt + 1}/{EMBED_MAX_RETRIES}): {e}")
+                time.sleep(2 ** attempt)
+    
+    def index_chunks(self, chunks: List[str], metadatas: List[dict], ids: List[str], source: Optional[str] = None):
+        """Embed chunks in concurrent batches and upsert each batch into the store as it completes
+
+        With a source, that source's chunks not in ids (rows or parts the new upload
+        no longer has) are deleted once every batch is in.
+        """
+        collection = self.get_vector_store()._collection
+        batches = [(start, min(start + EMBED_BATCH_SIZE, len(chunks))) for start in range(0, len(chunks), EMBED_BATCH_SIZE)]
+        
+        with ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY) as pool:
+            futures = {pool.submit(self.embed_batch, chunks[start:end]): (start, end) for start, end in batches}
+            for future in as_completed(futures):
+                start, end = futures[future]
+                # Upsert on row IDs: re-uploading a file overwrites its chunks instead of duplicating them
+                collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=future.result(),
+                    documents=chunks[start:end],
+                    metadatas=metadatas[start:end]
+                )
+                self.progress["chunks_indexed"] += end - start
+                self.progress["batches_done"] += 1
+        
+        # Only after the new chunks are in, so a failed re-upload keeps the old ones searchable
+        if source is not None:
+            current = set(ids)
+            stale = [i for i in collection.get(where={"source": source}, include=[])["ids"] if i not in current]
+            for start in range(0, len(stale), EMBED_BATCH_SIZE):
+                collection.delete(ids=stale[start:start + EMBED_BATCH_SIZE])
+            self.progress["chunks_removed"] = len(stale)
+        
+        # chromadb < 0.4 only writes to disk on persist(); newer versions persist automatically
+        if hasattr(self.vector_store, "persist"):
+            try:
+                self.vector_store.persist()
+            except Exception:
+                pass
+    
+    def start_processing(self, file_path: str) -> bool:
+        """Claim the ingest slot; False if another CSV is still being indexed"""
+        if not self._ingest_lock.acquire(blocking=False):
+            return False
+        self.progress = {
+            "status": "queued",
+            "file": os.path.basename(file_path),
+            "rows": 0,
+            "chunks_total": 0,
+            "chunks_indexed": 0,
+            "batches_done": 0,
+            "started_at": datetime.now().isoformat()
+        }
+        return True
+    
+    def process_csv_in_background(self, file_path: str):
+        """Run process_csv in a worker thread (started with start_processing) and release the ingest slot"""
+        try:
+            self.process_csv(file_path)
+        finally:
+            self._ingest_lock.release()
+    
     def process_csv(self, file_path: str):
+        started = time.time()
+        self.progress.update({"status": "processing", "file": os.path.basename(file_path)})
+        self.progress.setdefault("chunks_indexed", 0)
+        self.progress.setdefault("batches_done", 0)
+        
+        def fail(message: str):
+            print(f"Error: {message}")
+            self.progress.update({"status": "error", "error": message, "finished_at": datetime.now().isoformat()})
+            return False
+        
         try:
             print(f"Processing CSV: {file_path}")
             
             if not self.embeddings:
-                print("Error: Embeddings not initialized")
-                return False
+                return fail("Embeddings not initialized")
             
             # Load CSV with error handling
             try:
@@ -91,101 +287,62 @@ class RAGSystem:
                 print(f"CSV loaded successfully. Shape: {df.shape}")
                 print(f"Columns: {list(df.columns)}")
             except Exception as e:
-                print(f"Error loading CSV: {e}")
-                return False
+                return fail(f"Error loading CSV: {e}")
             
             if df.empty:
-                print("Error: CSV file is empty")
-                return False
-            
-            # Convert to text documents
-            documents = []
-            for idx, row in df.iterrows():
-                text_parts = []
-                for col, val in row.items():
-                    if pd.notna(val) and str(val).strip():
-                        text_parts.append(f"{col}: {str(val).strip()}")
-                
-                if text_parts:  # Only add if there's content
-                    text = " | ".join(text_parts)
-                    documents.append(text)
-            
-            print(f"Created {len(documents)} text documents")
+                return fail("CSV file is empty")
+            self.progress["rows"] = len(df)
             
-            if not documents:
-                print("Error: No valid documents created from CSV")
-                return False
+            # One chunk per record; long rows split on field boundaries
+            split_docs, metadatas = chunk_rows(df)
+            print(f"Created {len(split_docs)} chunks from {len(df)} rows")
             
-            # Split documents
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=500,  # Smaller chunks for better processing
-                chunk_overlap=50
-            )
-            
-            split_docs = []
-            for doc in documents:
-                if doc.strip():
-                    splits = text_splitter.split_text(doc)
-                    split_docs.extend(splits)
+            if not split_docs:
+                return fail("No valid document chunks created from CSV")
             
-            print(f"Split into {len(split_docs)} chunks")
+            # Chunk IDs follow the row ID, not the row's position, so edited or reordered
+            # files overwrite the right chunks; a repeated row ID gets an occurrence suffix
+            source = os.path.basename(file_path)
+            seen = {}
+            ids = []
+            for metadata in metadatas:
+                metadata["source"] = source
+                key = (metadata["row_id"], metadata["part"])
+                seen[key] = seen.get(key, 0) + 1
+                suffix = f"#{seen[key] - 1}" if seen[key] > 1 else ""
+                ids.append(f"{source}:{metadata['row_id']}{suffix}:{metadata['part']}")
+            self.progress["chunks_total"] = len(split_docs)
             
-            if not split_docs:
-                print("Error: No valid document chunks created")
-                return False
+            try:
+                self.index_chunks(split_docs, metadatas, ids, source=source)
+                print(f"Indexed {len(split_docs)} chunks into {CHROMA_DIR}")
+            except Exception as e:
+                return fail(f"Error indexing chunks: {e}")
             
-            # Create vector store with retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
+            # Create QA chain
+            if self.qa_chain is None:
                 try:
-                    print(f"Creating vector store (attempt {attempt + 1}/{max_retries})...")
-                    
-                    # Ensure directory exists
-                    os.makedirs("./data/chroma_db", exist_ok=True)
-                    
-                    self.vector_store = Chroma.from_texts(
-                        texts=split_docs[:50],  # Limit to first 50 chunks for testing
-                        embedding=self.embeddings,
-                        persist_directory="./data/chroma_db"
-                    )
-                    print("Vector store created successfully")
-                    break
-                    
+                    print("Creating QA chain...")
+                    self.create_qa_chain()
+                    print("QA chain created successfully")
                 except Exception as e:
-                    print(f"Attempt {attempt + 1} failed: {e}")
-                    if attempt == max_retries - 1:
-                        print("All attempts failed")
-                        return False
-                    import time
-                    time.sleep(2)  # Wait before retry
+                    import traceback
+                    traceback.print_exc()
+                    return fail(f"Error creating QA chain: {e}")
             
-            # Create QA chain
-            try:
-                print("Creating QA chain...")
-                if USING_NEW_LANGCHAIN:
-                    llm = OpenAI(api_key=openai_api_key, temperature=0)
-                else:
-                    llm = OpenAI(openai_api_key=openai_api_key, temperature=0)
-                
-                self.qa_chain = RetrievalQA.from_chain_type(
-                    llm=llm,
-                    chain_type="stuff",
-                    retriever=self.vector_store.as_retriever(search_kwargs={"k": 3})
-                )
-                print("QA chain created successfully")
-                return True
-                
-            except Exception as e:
-                print(f"Error creating QA chain: {e}")
-                import traceback
-                traceback.print_exc()
-                return False
+            elapsed = time.time() - started
+            self.progress.update({
+                "status": "completed",
+                "seconds": round(elapsed, 1),
+                "chunks_per_sec": round(len(split_docs) / elapsed, 1) if elapsed > 0 else 0.0,
+                "finished_at": datetime.now().isoformat()
+            })
+            return True
                 
         except Exception as e:
-            print(f"Error processing CSV: {e}")
             import traceback
             traceback.print_exc()
-            return False
+            return fail(f"Error processing CSV: {e}")
     
     def query(self, question: str):
         if not self.qa_chain:
@@ -219,23 +376,11 @@ async def set_openai_key(api_key: str = Form(...)):
         return {"status": "error", "message": str(e)}
 
 @app.post("/api/upload-csv")
-async def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     try:
         if not file.filename.endswith('.csv'):
             return {"status": "error", "message": "Please upload a CSV file"}
         
-        # Ensure uploads directory exists
-        os.makedirs("data/uploads", exist_ok=True)
-        
-        # Save uploaded file
-        file_path = f"data/uploads/{file.filename}"
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        print(f"File saved to: {file_path}")
-        print(f"File size: {len(content)} bytes")
-        
         # Check if OpenAI key is set
         if not openai_api_key:
             return {
@@ -243,20 +388,38 @@ async def upload_csv(file: UploadFile = File(...)):
                 "message": "Please set your OpenAI API key first"
             }
         
-        # Process CSV
-        success = rag_system.process_csv(file_path)
-        
-        if success:
-            return {
-                "status": "success", 
-                "message": f"CSV file '{file.filename}' processed successfully",
-                "file_path": file_path
-            }
-        else:
+        if not rag_system.start_processing(file.filename):
             return {
-                "status": "error", 
-                "message": "Failed to process CSV. Check API logs for details."
+                "status": "error",
+                "message": "Another CSV is still being processed",
+                "progress": rag_system.progress
             }
+        
+        try:
+            # Ensure uploads directory exists
+            os.makedirs("data/uploads", exist_ok=True)
+            
+            # Save uploaded file
+            file_path = f"data/uploads/{file.filename}"
+            with open(file_path, "wb") as buffer:
+                content = await file.read()
+                buffer.write(content)
+        except Exception:
+            rag_system._ingest_lock.release()
+            raise
+        
+        print(f"File saved to: {file_path}")
+        print(f"File size: {len(content)} bytes")
+        
+        # Embedding runs in the threadpool after the response is sent; poll /api/upload-status
+        background_tasks.add_task(rag_system.process_csv_in_background, file_path)
+        
+        return {
+            "status": "success", 
+            "message": f"CSV file '{file.filename}' uploaded, indexing started",
+            "file_path": file_path,
+            "progress": rag_system.progress
+        }
     except Exception as e:
         error_msg = f"Error uploading/processing CSV: {str(e)}"
         print(error_msg)
@@ -264,6 +427,10 @@ async def upload_csv(file: UploadFile = File(...)):
         traceback.print_exc()
         return {"status": "error", "message": error_msg}
 
+@app.get("/api/upload-status")
+async def upload_status():
+    return rag_system.progress
+
 @app.post("/api/query")
 async def query_rag(question: str = Form(...)):
     try:
@@ -283,6 +450,7 @@ async def get_status():
         "openai_configured": openai_api_key is not None,
         "vector_store_ready": rag_system.vector_store is not None,
         "qa_chain_ready": rag_system.qa_chain is not None,
+        "indexing": rag_system.progress,
         "using_new_langchain": USING_NEW_LANGCHAIN,
         "system": {
             "cpu_percent": psutil.cpu_percent(),